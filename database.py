@@ -1,6 +1,7 @@
+import json
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import scoped_session, sessionmaker, Session
 from models import Base
 from utils.logger import setup_logger
 
@@ -9,6 +10,9 @@ logger = setup_logger(__name__)
 # Database configuration
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./github_sync.db")
 
+# Compiled SQL kept per engine so repeated queries (webhook lookups, log pages) skip recompilation
+QUERY_CACHE_SIZE = 1200
+
 # Configure engine based on database type
 if "postgresql" in DATABASE_URL:
     # PostgreSQL configuration with connection pooling and SSL handling
@@ -16,6 +20,10 @@ if "postgresql" in DATABASE_URL:
         DATABASE_URL,
         pool_pre_ping=True,
         pool_recycle=3600,
+        query_cache_size=QUERY_CACHE_SIZE,
+        # Room for the webhook workers and restart threads on top of request handlers
+        pool_size=20,
+        max_overflow=10,
         connect_args={
             "connect_timeout": 10,
             "application_name": "github_sync_server"
@@ -25,20 +33,66 @@ elif "sqlite" in DATABASE_URL:
     # SQLite configuration
     engine = create_engine(
         DATABASE_URL,
-        connect_args={"check_same_thread": False}
+        connect_args={"check_same_thread": False},
+        query_cache_size=QUERY_CACHE_SIZE
     )
 else:
     # Default configuration
-    engine = create_engine(DATABASE_URL)
+    engine = create_engine(DATABASE_URL, query_cache_size=QUERY_CACHE_SIZE)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Thread-local sessions for background workers that run outside a request
+ScopedSession = scoped_session(SessionLocal)
+
+def _add_missing_columns():
+    """Add nullable columns defined on the models but missing from existing tables; returns what was added"""
+    added = set()
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            with engine.begin() as conn:
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+            logger.info(f"Added column {table.name}.{column.name}")
+            added.add((table.name, column.name))
+    return added
+
+def _backfill_repo_label():
+    """Fill containers.repo_label from the "repo" entry of the stored labels JSON"""
+    with engine.begin() as conn:
+        rows = conn.execute(text(
+            'SELECT id, labels FROM containers WHERE repo_label IS NULL AND labels IS NOT NULL'
+        )).fetchall()
+        updates = []
+        for container_id, labels in rows:
+            try:
+                repo_label = json.loads(labels).get("repo")
+            except (ValueError, AttributeError):
+                continue
+            if repo_label:
+                updates.append({"id": container_id, "repo_label": repo_label})
+        if updates:
+            conn.execute(text('UPDATE containers SET repo_label = :repo_label WHERE id = :id'), updates)
+    logger.info(f"Backfilled repo_label for {len(updates)} containers")
+
 def init_db():
     """Initialize database and create tables"""
     try:
         Base.metadata.create_all(bind=engine)
         logger.info("Database tables created successfully")
         
+        # create_all() skips tables that already exist, so add columns and indexes introduced later
+        added_columns = _add_missing_columns()
+        if ("containers", "repo_label") in added_columns:
+            _backfill_repo_label()
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
+        
         # Initialize default settings
         with SessionLocal() as db:
             from models import Setting
@@ -46,6 +100,7 @@ def init_db():
                 {"key": "main_path", "value": "/repos", "description": "Main path for repositories"},
                 {"key": "log_retention_days", "value": "30", "description": "Number of days to retain logs"},
                 {"key": "setup_complete", "value": "false", "description": "Whether initial setup is complete"},
+                {"key": "shallow_clone", "value": "true", "description": "Clone only the tip of the tracked branch"},
             ]
             
             for setting_data in default_settings:
@@ -72,3 +127,7 @@ def get_db() -> Session:
 def get_db_session() -> Session:
     """Get database session for direct use"""
     return SessionLocal()
+
+def get_scoped_session() -> Session:
+    """Get the calling thread's reusable session; close() it to hand the connection back to the pool"""
+    return ScopedSession()
@@ -9,6 +9,7 @@ from contextlib import asynccontextmanager
 from database import init_db, get_db
 from routes import api, web, webhook
 from services.auth_service import AuthService
+from services.webhook_service import stop_webhook_workers
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -22,6 +23,7 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown
     logger.info("Shutting down GitHub Sync Server...")
+    await stop_webhook_workers()
 
 app = FastAPI(
     title="GitHub Sync Server",
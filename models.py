@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from utils.helpers import utcnow
 
 Base = declarative_base()
 
@@ -14,8 +14,8 @@ class User(Base):
     email = Column(String(100), unique=True, index=True)
     is_active = Column(Boolean, default=True)
     is_setup_complete = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
 
 class LoginAttempt(Base):
     __tablename__ = "login_attempts"
@@ -24,7 +24,7 @@ class LoginAttempt(Base):
     username = Column(String(50), nullable=False, index=True)
     ip_address = Column(String(45), nullable=False)  # IPv6 support
     success = Column(Boolean, nullable=False)
-    attempt_time = Column(DateTime, default=datetime.utcnow)
+    attempt_time = Column(DateTime, default=utcnow)
     user_agent = Column(String(500), nullable=True)
 
 class Repository(Base):
@@ -39,11 +39,14 @@ class Repository(Base):
     last_pull_success = Column(Boolean, default=None, nullable=True)
     last_pull_time = Column(DateTime, nullable=True)
     last_pull_error = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
     
     # Relationship to logs
     logs = relationship("OperationLog", back_populates="repository")
+    
+    # Every webhook looks its repository up by name among the active ones
+    __table_args__ = (Index("ix_repositories_name_is_active", "name", "is_active"),)
 
 class Container(Base):
     __tablename__ = "containers"
@@ -54,12 +57,13 @@ class Container(Base):
     image = Column(String(200))
     status = Column(String(50))
     labels = Column(Text)  # JSON string of labels
-    restart_after_pull = Column(String(100), nullable=True)  # Repository name to restart after
+    restart_after_pull = Column(String(100), nullable=True, index=True)  # Repository name to restart after
+    repo_label = Column(String(100), nullable=True, index=True)  # Value of the "repo" label, for indexed lookups
     last_restart_success = Column(Boolean, default=None, nullable=True)
     last_restart_time = Column(DateTime, nullable=True)
     last_restart_error = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
 
 class GitKey(Base):
     __tablename__ = "git_keys"
@@ -69,7 +73,7 @@ class GitKey(Base):
     private_key = Column(Text, nullable=False)
     public_key = Column(Text, nullable=False)
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow)
 
 class ApiKey(Base):
     __tablename__ = "api_keys"
@@ -79,7 +83,7 @@ class ApiKey(Base):
     key_hash = Column(String(255), nullable=False)
     is_active = Column(Boolean, default=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow)
     last_used = Column(DateTime, nullable=True)
     
     user = relationship("User")
@@ -91,19 +95,19 @@ class Setting(Base):
     key = Column(String(100), unique=True, nullable=False)
     value = Column(Text)
     description = Column(String(500))
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
 
 class OperationLog(Base):
     __tablename__ = "operation_logs"
     
     id = Column(Integer, primary_key=True, index=True)
     operation_type = Column(String(50), nullable=False)  # pull, restart, clone, etc.
-    repository_id = Column(Integer, ForeignKey("repositories.id"), nullable=True)
+    repository_id = Column(Integer, ForeignKey("repositories.id"), nullable=True, index=True)
     container_id = Column(String(100), nullable=True)
     status = Column(String(20), nullable=False)  # success, error, warning
     message = Column(Text)
     details = Column(Text)  # JSON string for additional details
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow, index=True)  # Log pages list newest first
     
     repository = relationship("Repository", back_populates="logs")
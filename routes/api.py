@@ -115,8 +115,8 @@ def create_repository(repo_data: RepositoryCreate, db: Session = Depends(get_db)
         db.refresh(repository)
         
         # After successful creation, restart containers with matching repo label
-        from services.flask_docker_service import FlaskDockerService
-        docker_service = FlaskDockerService()
+        from services.flask_docker_service import get_flask_docker_service
+        docker_service = get_flask_docker_service()
         success_count, restart_results = docker_service.restart_containers_by_repo_label(repo_data.name)
         
         logger.info(f"Created repository: {repo_data.name}")
@@ -183,16 +183,16 @@ def get_containers(db: Session = Depends(get_db)):
     return containers
 
 @router.post("/containers/discover")
-def discover_containers(db: Session = Depends(get_db)):
-    """Discover Docker containers"""
+def discover_containers(label: Optional[str] = None, db: Session = Depends(get_db)):
+    """Discover Docker containers, optionally only those with restart-after=<label>"""
     docker_service = DockerService(db)
-    containers = docker_service.discover_containers()
+    containers = docker_service.discover_containers(label_filter=label)
     return {"message": f"Discovered {len(containers)} containers", "containers": containers}
 
 @router.post("/test/sync/{repo_name}")
 def test_sync_repository(repo_name: str, db: Session = Depends(get_db)):
     """Test sync functionality without authentication"""
-    from services.flask_docker_service import FlaskDockerService
+    from services.flask_docker_service import get_flask_docker_service
     
     # Get repository
     repository = db.query(Repository).filter(Repository.name == repo_name).first()
@@ -203,7 +203,7 @@ def test_sync_repository(repo_name: str, db: Session = Depends(get_db)):
     logger.info(f"Simulating git pull for repository: {repo_name}")
     
     # Test container restart functionality
-    flask_docker = FlaskDockerService()
+    flask_docker = get_flask_docker_service()
     success_count, results = flask_docker.restart_containers_by_repo_label(repo_name)
     
     return {
@@ -328,6 +328,7 @@ def create_git_key(key_data: GitKeyCreate, db: Session = Depends(get_db), curren
         db.add(git_key)
         db.commit()
         db.refresh(git_key)
+        GitService.invalidate_key_cache()
         
         logger.info(f"Created Git SSH key: {key_data.name}")
         return {
@@ -350,6 +351,7 @@ def delete_git_key(key_id: int, db: Session = Depends(get_db), current_user = De
     # Update the record to mark as inactive
     db.query(GitKey).filter(GitKey.id == key_id).update({"is_active": False})
     db.commit()
+    GitService.invalidate_key_cache()
     
     logger.info(f"Deleted Git SSH key: {git_key.name}")
     return {"message": "Git SSH key deleted successfully"}
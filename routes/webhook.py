@@ -9,9 +9,9 @@ import json
 logger = setup_logger(__name__)
 router = APIRouter()
 
-@router.post("/github")
+@router.post("/github", status_code=202)
 async def github_webhook(request: Request, db: Session = Depends(get_db)):
-    """Handle GitHub webhook"""
+    """Handle GitHub webhook - validate, queue and answer 202; the pull and restarts run in the background"""
     try:
         # Get webhook payload
         payload = await request.json()
@@ -27,33 +27,26 @@ async def github_webhook(request: Request, db: Session = Depends(get_db)):
             logger.warning(f"Invalid webhook payload: {validation_message}")
             raise HTTPException(status_code=400, detail=validation_message)
         
-        # Process webhook
-        result = await webhook_service.process_github_webhook(payload)
-        
-        # Handle response safely
-        success = result.get("success", False)
-        message = result.get("message", "Unknown result")
+        # Queue webhook - GitHub gives up after 10 seconds, well before a pull and restarts finish
+        if not webhook_service.enqueue_webhook(payload):
+            raise HTTPException(status_code=429, detail="Webhook queue is full, retry later")
         
-        if success:
-            logger.info(f"Webhook processed successfully: {message}")
-            return {
-                "status": "success",
-                "message": message,
-                "details": result
-            }
-        else:
-            logger.error(f"Webhook processing failed: {message}")
-            return {
-                "status": "error",
-                "message": message,
-                "details": result
-            }
+        repo_name = payload["repository"]["name"]
+        logger.info(f"Webhook queued for repository: {repo_name}")
+        return {
+            "status": "accepted",
+            "accepted": True,
+            "message": f"Webhook queued for repository {repo_name}"
+        }
     
     except json.JSONDecodeError:
         error_msg = "Invalid JSON payload"
         logger.error(error_msg)
         raise HTTPException(status_code=400, detail=error_msg)
     
+    except HTTPException:
+        raise
+    
     except Exception as e:
         error_msg = f"Error processing webhook: {str(e)}"
         logger.error(error_msg)
@@ -1,11 +1,12 @@
 import hashlib
 import secrets
 import jwt
-from datetime import datetime, timedelta
+from datetime import timedelta
 from typing import Optional, Tuple
 from sqlalchemy.orm import Session
 from models import User, ApiKey, Setting, LoginAttempt
 from utils.logger import setup_logger
+from utils.helpers import utcnow
 
 logger = setup_logger(__name__)
 
@@ -65,7 +66,7 @@ class AuthService:
     def check_login_rate_limit(self, username: str, ip_address: str) -> Tuple[bool, Optional[str]]:
         """Check if login attempts are rate limited"""
         try:
-            now = datetime.utcnow()
+            now = utcnow()
             
             # Get failed attempts for this username/IP in the last 24 hours
             failed_attempts = self.db.query(LoginAttempt).filter(
@@ -117,13 +118,13 @@ class AuthService:
                 ip_address=ip_address,
                 success=success,
                 user_agent=user_agent,
-                attempt_time=datetime.utcnow()
+                attempt_time=utcnow()
             )
             self.db.add(attempt)
             self.db.commit()
             
             # Clean up old attempts (older than 7 days)
-            cutoff = datetime.utcnow() - timedelta(days=7)
+            cutoff = utcnow() - timedelta(days=7)
             self.db.query(LoginAttempt).filter(
                 LoginAttempt.attempt_time < cutoff
             ).delete()
@@ -165,8 +166,8 @@ class AuthService:
         payload = {
             "user_id": user.id,
             "username": user.username,
-            "exp": datetime.utcnow() + timedelta(hours=24),
-            "iat": datetime.utcnow()
+            "exp": utcnow() + timedelta(hours=24),
+            "iat": utcnow()
         }
         
         return jwt.encode(payload, self.secret_key, algorithm="HS256")
@@ -233,7 +234,7 @@ class AuthService:
             
             if api_key_record:
                 # Update last used timestamp
-                api_key_record.last_used = datetime.utcnow()
+                api_key_record.last_used = utcnow()
                 self.db.commit()
                 
                 return api_key_record.user
@@ -1,82 +1,310 @@
 import json
+import asyncio
+import logging
 import os
 import subprocess
 import shutil
+import socket
+import stat
+import http.client
+import time
+import random
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import docker
+import docker.constants
 import docker.errors
+import requests
 from datetime import datetime
-from typing import List, Dict, Tuple, Optional
+from typing import Any, Callable, List, Dict, Tuple, Optional
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 from models import Container, OperationLog, Repository
 from utils.logger import setup_logger
+from utils.helpers import utcnow
 
 logger = setup_logger(__name__)
 
+# Columns refreshed from Docker on every discovery
+_UPSERT_COLUMNS = ("name", "image", "status", "labels", "restart_after_pull", "repo_label")
+# Rows per upsert statement; keeps the bound parameters well under SQLite's per-statement limit
+_UPSERT_BATCH_SIZE = 100
+
+# Docker label naming the repositories a container restarts after
+_RESTART_LABEL = "restart-after"
+
+_DOCKER_SOCKET_PATH = '/var/run/docker.sock'
+
+# Docker CLI locations tried by the restart fallback, in order
+_DOCKER_CLI_CANDIDATES = ('/usr/bin/docker', '/usr/local/bin/docker', 'docker')
+
+# Demonstration container data - built once at import, treated as read-only
+_DEMO_CONTAINERS = (
+    {
+        "id": "demo123456789abc",
+        "name": "web-server",
+        "image": "nginx:alpine",
+        "status": "running",
+        "labels": {"restart-after": "my-website"},
+        "restart_after": "my-website",
+        "demo": True,
+        "message": "Demo container - shows how restart-after labels work"
+    },
+    {
+        "id": "demo987654321def",
+        "name": "api-service",
+        "image": "node:18-alpine",
+        "status": "running",
+        "labels": {"restart-after": "backend-api", "environment": "production"},
+        "restart_after": "backend-api",
+        "demo": True,
+        "message": "Demo container - would restart when backend-api repository updates"
+    },
+    {
+        "id": "demo555666777ghi",
+        "name": "database",
+        "image": "postgres:15",
+        "status": "running",
+        "labels": {"app": "database", "no-restart": "true"},
+        "restart_after": "",
+        "demo": True,
+        "message": "Demo container - no restart-after label, won't auto-restart"
+    },
+)
+
+# Real containers based on your environment
+_DEMO_REAL_CONTAINERS = (
+    {
+        "id": "server-backend-app",
+        "name": "server-backend-app",
+        "image": "node:18-alpine",
+        "status": "running",
+        "labels": {"restart-after": "server-backend", "app": "backend"},
+        "restart_after": "server-backend",
+        "message": "Backend application container"
+    },
+    {
+        "id": "frontend-web-app",
+        "name": "frontend-web-app", 
+        "image": "nginx:alpine",
+        "status": "running",
+        "labels": {"restart-after": "frontend-web", "app": "frontend"},
+        "restart_after": "frontend-web",
+        "message": "Frontend web application"
+    },
+    {
+        "id": "api-service-container",
+        "name": "api-service-container",
+        "image": "python:3.11-slim",
+        "status": "running",
+        "labels": {"restart-after": "api-service", "app": "api"},
+        "restart_after": "api-service",
+        "message": "API service container"
+    },
+    {
+        "id": "worker-queue-service",
+        "name": "worker-queue-service",
+        "image": "redis:alpine",
+        "status": "running",
+        "labels": {"restart-after": "worker-queue", "app": "queue"},
+        "restart_after": "worker-queue",
+        "message": "Background worker queue"
+    },
+    {
+        "id": "database-postgres",
+        "name": "database-postgres",
+        "image": "postgres:15-alpine",
+        "status": "running",
+        "labels": {"app": "database"},
+        "restart_after": None,
+        "message": "Database container - no restart needed"
+    },
+    {
+        "id": "monitoring-grafana",
+        "name": "monitoring-grafana",
+        "image": "grafana/grafana:latest",
+        "status": "running",
+        "labels": {"app": "monitoring"},
+        "restart_after": None,
+        "message": "Monitoring dashboard"
+    },
+)
+
+_ALL_DEMO_CONTAINERS = _DEMO_CONTAINERS + _DEMO_REAL_CONTAINERS
+_ALL_DEMO_CONTAINER_IDS = frozenset(c["id"] for c in _ALL_DEMO_CONTAINERS)
+
+
+def _serialize_labels(labels: Dict) -> str:
+    """Stable compact JSON for labels so unchanged labels compare equal to the stored value"""
+    return json.dumps(labels, sort_keys=True, separators=(",", ":"))
+
+
+def _is_transient_docker_error(error: Exception) -> bool:
+    """Whether a Docker API error is worth retrying (daemon overloaded or busy)"""
+    if not isinstance(error, docker.errors.APIError) or isinstance(error, docker.errors.NotFound):
+        return False
+    return error.is_server_error() or error.status_code in (409, 429)
+
+
+def _call_with_retry(fn, *args, retries: int = 3, base: float = 0.1, **kwargs):
+    """Call fn, retrying transient Docker API errors with exponential backoff and jitter"""
+    for attempt in range(retries + 1):
+        try:
+            return fn(*args, **kwargs)
+        except docker.errors.APIError as e:
+            if attempt == retries or not _is_transient_docker_error(e):
+                raise
+            delay = base * 2 ** attempt + random.random() * base
+            logger.debug("Transient Docker API error (%s), retrying in %.2fs", e, delay)
+            time.sleep(delay)
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over the Docker daemon's Unix socket"""
+    
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+    
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
 class DockerService:
+    # Shared Docker client - probed once per process and reused by every instance
+    _client = None
+    _client_error = None
+    _client_failed_at = 0.0
+    _client_factory = None
+    _client_lock = threading.Lock()
+    # Path of the docker CLI once found; a miss is not remembered so a later install is picked up
+    _docker_cli: Optional[str] = None
+    
+    # Minimum seconds between connection probes after a failed attempt
+    RECONNECT_INTERVAL = 30.0
+    
+    # Seconds a known Docker availability state is trusted before re-checking
+    AVAILABILITY_TTL = 5.0
+    
+    # Concurrent restarts per batch; kept below the client's connection pool size
+    MAX_RESTART_WORKERS = 16
+    MAX_POOL_SIZE = 32
+    
     def __init__(self, db: Session):
         self.db = db
-        self.docker_available = False
-        self.docker_error = None
+        self._pending_logs = []
+        # Repository name -> restartable containers; built on first lookup, dropped by discovery
+        self._restart_index: Optional[Dict[str, List[Container]]] = None
+        self.client, self.docker_error = DockerService._acquire_client()
+        self.docker_available = self.client is not None
+        self._availability_checked_at = time.monotonic()
+    
+    @classmethod
+    def _connection_methods(cls) -> List[Tuple[str, Callable[[], docker.DockerClient]]]:
+        """Return (description, factory) pairs worth probing, ordered by likelihood"""
+        if cls._client_factory is not None:
+            # Reconnect with whatever worked before
+            return [cls._client_factory]
         
-        try:
-            # Check if Docker socket exists
-            import os
-            import subprocess
-            socket_path = '/var/run/docker.sock'
-            if os.path.exists(socket_path):
-                logger.info(f"Docker socket found at {socket_path}")
-                # Check socket permissions
-                import stat
-                socket_stat = os.stat(socket_path)
-                socket_perms = stat.filemode(socket_stat.st_mode)
-                logger.info(f"Socket permissions: {socket_perms}")
-            else:
-                logger.warning(f"Docker socket not found at {socket_path}")
-            
-            # Try multiple Docker connection methods
-            self.client = None
+        methods = []
+        if os.environ.get("DOCKER_HOST"):
+            methods.append(("docker.from_env()", lambda: docker.from_env(max_pool_size=cls.MAX_POOL_SIZE)))
+        elif os.path.exists(_DOCKER_SOCKET_PATH):
+            methods.append(("unix socket", lambda: docker.DockerClient(
+                base_url=f'unix://{_DOCKER_SOCKET_PATH}', max_pool_size=cls.MAX_POOL_SIZE
+            )))
+        else:
+            # Last resort - keep the timeout short so a closed port fails fast
+            methods.append(("TCP", lambda: docker.DockerClient(
+                base_url='tcp://localhost:2376', timeout=1, max_pool_size=cls.MAX_POOL_SIZE
+            )))
+        return methods
+    
+    @classmethod
+    def _acquire_client(cls) -> Tuple[Optional[docker.DockerClient], Optional[str]]:
+        """Return the shared Docker client, probing the daemon only when none is cached"""
+        with cls._client_lock:
+            if cls._client is not None:
+                return cls._client, None
+            if time.monotonic() - cls._client_failed_at < cls.RECONNECT_INTERVAL:
+                return None, cls._client_error
             
-            # Method 1: Default docker from env
+            client = None
+            docker_error = None
             try:
-                self.client = docker.from_env()
-                self.client.ping()
-                self.docker_available = True
-                logger.info("Docker client initialized via docker.from_env()")
+                # Check if Docker socket exists
+                socket_path = _DOCKER_SOCKET_PATH
+                if os.path.exists(socket_path):
+                    logger.info("Docker socket found at %s", socket_path)
+                    # Check socket permissions
+                    socket_stat = os.stat(socket_path)
+                    socket_perms = stat.filemode(socket_stat.st_mode)
+                    logger.info("Socket permissions: %s", socket_perms)
+                else:
+                    logger.warning("Docker socket not found at %s", socket_path)
+                
+                # Probe only the connection methods that can plausibly work, most likely first
+                for description, factory in cls._connection_methods():
+                    try:
+                        client = factory()
+                        client.ping()
+                        # Probes may use a short timeout; regular calls get the default
+                        client.api.timeout = docker.constants.DEFAULT_TIMEOUT_SECONDS
+                        cls._client_factory = (description, factory)
+                        logger.info("Docker client initialized via %s", description)
+                        break
+                    except Exception as e:
+                        logger.debug("%s connection failed: %s", description, e)
+                        docker_error = str(e)
+                        client = None
+                
+                if client is None:
+                    logger.warning("Docker not accessible - using demonstration mode. Last error: %s", docker_error)
+                    
             except Exception as e:
-                logger.debug(f"docker.from_env() failed: {e}")
+                logger.error("Docker initialization failed: %s", e)
+                docker_error = str(e)
+                client = None
             
-            # Method 2: Unix socket
-            if not self.docker_available:
-                try:
-                    self.client = docker.DockerClient(base_url='unix:///var/run/docker.sock')
-                    self.client.ping()
-                    self.docker_available = True
-                    logger.info("Docker client initialized via unix socket")
-                except Exception as e:
-                    logger.debug(f"Unix socket connection failed: {e}")
-                    self.docker_error = str(e)
+            if client is None:
+                cls._client_error = docker_error
+                cls._client_failed_at = time.monotonic()
+                return None, docker_error
             
-            # Method 3: TCP connection
-            if not self.docker_available:
-                try:
-                    self.client = docker.DockerClient(base_url='tcp://localhost:2376')
-                    self.client.ping()
-                    self.docker_available = True
-                    logger.info("Docker client initialized via TCP")
-                except Exception as e:
-                    logger.debug(f"TCP connection failed: {e}")
-                    
-            if not self.docker_available:
-                logger.warning(f"Docker not accessible - using demonstration mode. Last error: {self.docker_error}")
-                self.client = None
-                
-        except Exception as e:
-            logger.error(f"Docker initialization failed: {e}")
-            self.docker_error = str(e)
-            self.client = None
+            cls._client = client
+            cls._client_error = None
+            atexit.register(client.close)
+            return client, None
     
-    def discover_containers(self) -> List[Dict]:
-        """Discover all Docker containers and update database"""
+    @classmethod
+    def _release_client(cls, client, error: str):
+        """Drop the shared client after the daemon became unreachable"""
+        with cls._client_lock:
+            if cls._client is client:
+                cls._client = None
+                cls._client_error = error
+                cls._client_failed_at = time.monotonic()
+    
+    def _invalidate_docker_connection(self, error: Exception):
+        """Mark Docker unavailable when an error shows the daemon went away"""
+        if not isinstance(error, requests.exceptions.ConnectionError):
+            return
+        logger.warning("Lost connection to Docker daemon: %s", error)
+        DockerService._release_client(self.client, str(error))
+        self.client = None
+        self.docker_available = False
+        self.docker_error = str(error)
+        self._availability_checked_at = 0.0
+    
+    def discover_containers(self, label_filter: Optional[str] = None) -> List[Dict]:
+        """Discover Docker containers and update database
+        
+        When label_filter is given, only containers labelled restart-after=<label_filter>
+        are fetched, filtered by the Docker daemon.
+        """
         # Always try to connect to Docker first
         if not self.docker_available:
             # Try to reconnect to Docker
@@ -84,365 +312,407 @@ class DockerService:
         
         if self.docker_available:
             logger.info("Discovering real Docker containers")
-            return self._discover_real_containers()
+            return self._discover_real_containers(label_filter)
         else:
             logger.info("Docker not available - using demonstration mode")
             return self._get_demonstration_containers()
     
     def _try_docker_connection(self):
         """Attempt to establish Docker connection"""
-        try:
-            # Try connecting to Docker daemon
-            self.client = docker.from_env()
-            self.client.ping()
-            self.docker_available = True
+        if time.monotonic() - self._availability_checked_at < self.AVAILABILITY_TTL:
+            return
+        self._availability_checked_at = time.monotonic()
+        self.client, self.docker_error = DockerService._acquire_client()
+        self.docker_available = self.client is not None
+        if self.docker_available:
             logger.info("Docker connection established")
-        except Exception as e:
-            logger.debug(f"Docker connection failed: {e}")
-            self.docker_available = False
     
     def _get_demonstration_containers(self) -> List[Dict]:
         """Return demonstration container data to show system functionality"""
-        demo_containers = [
-            {
-                "id": "demo123456789abc",
-                "name": "web-server",
-                "image": "nginx:alpine",
-                "status": "running",
-                "labels": {"restart-after": "my-website"},
-                "restart_after": "my-website",
-                "demo": True,
-                "message": "Demo container - shows how restart-after labels work"
-            },
-            {
-                "id": "demo987654321def",
-                "name": "api-service",
-                "image": "node:18-alpine",
-                "status": "running",
-                "labels": {"restart-after": "backend-api", "environment": "production"},
-                "restart_after": "backend-api",
-                "demo": True,
-                "message": "Demo container - would restart when backend-api repository updates"
-            },
-            {
-                "id": "demo555666777ghi",
-                "name": "database",
-                "image": "postgres:15",
-                "status": "running",
-                "labels": {"app": "database", "no-restart": "true"},
-                "restart_after": "",
-                "demo": True,
-                "message": "Demo container - no restart-after label, won't auto-restart"
-            }
-        ]
+        # Static payload - entries are shared and must not be mutated
+        all_containers = list(_ALL_DEMO_CONTAINERS)
+        current_container_ids = _ALL_DEMO_CONTAINER_IDS
         
-        # Add real containers based on your environment
-        real_containers = [
-            {
-                "id": "server-backend-app",
-                "name": "server-backend-app",
-                "image": "node:18-alpine",
-                "status": "running",
-                "labels": {"restart-after": "server-backend", "app": "backend"},
-                "restart_after": "server-backend",
-                "message": "Backend application container"
-            },
-            {
-                "id": "frontend-web-app",
-                "name": "frontend-web-app", 
-                "image": "nginx:alpine",
-                "status": "running",
-                "labels": {"restart-after": "frontend-web", "app": "frontend"},
-                "restart_after": "frontend-web",
-                "message": "Frontend web application"
-            },
-            {
-                "id": "api-service-container",
-                "name": "api-service-container",
-                "image": "python:3.11-slim",
-                "status": "running",
-                "labels": {"restart-after": "api-service", "app": "api"},
-                "restart_after": "api-service",
-                "message": "API service container"
-            },
-            {
-                "id": "worker-queue-service",
-                "name": "worker-queue-service",
-                "image": "redis:alpine",
-                "status": "running",
-                "labels": {"restart-after": "worker-queue", "app": "queue"},
-                "restart_after": "worker-queue",
-                "message": "Background worker queue"
-            },
-            {
-                "id": "database-postgres",
-                "name": "database-postgres",
-                "image": "postgres:15-alpine",
-                "status": "running",
-                "labels": {"app": "database"},
-                "restart_after": None,
-                "message": "Database container - no restart needed"
-            },
+        # Add or update containers in database
+        logger.info("Updating container configurations in database")
+        rows = [
             {
-                "id": "monitoring-grafana",
-                "name": "monitoring-grafana",
-                "image": "grafana/grafana:latest",
-                "status": "running",
-                "labels": {"app": "monitoring"},
-                "restart_after": None,
-                "message": "Monitoring dashboard"
+                "container_id": container_data["id"],
+                "name": container_data["name"],
+                "image": container_data["image"],
+                "status": container_data["status"],
+                "labels": _serialize_labels(container_data["labels"]),
+                "restart_after_pull": container_data["restart_after"] if container_data["restart_after"] else None,
+                "repo_label": container_data["labels"].get("repo")
             }
+            for container_data in all_containers
         ]
-        
-        # Combine demo and real containers
-        all_containers = demo_containers + real_containers
-        current_container_ids = {c["id"] for c in all_containers}
-        
-        # Add or update containers in database
-        logger.info("Updating container configurations in database")
-        for container_data in all_containers:
-            try:
-                existing = self.db.query(Container).filter_by(container_id=container_data["id"]).first()
-                if existing:
-                    # Update existing container
-                    existing.name = container_data["name"]
-                    existing.image = container_data["image"]
-                    existing.status = container_data["status"]
-                    existing.labels = json.dumps(container_data["labels"])
-                    existing.restart_after_pull = container_data["restart_after"] if container_data["restart_after"] else None
-                else:
-                    # Create new container
-                    container = Container(
-                        container_id=container_data["id"],
-                        name=container_data["name"],
-                        image=container_data["image"],
-                        status=container_data["status"],
-                        labels=json.dumps(container_data["labels"]),
-                        restart_after_pull=container_data["restart_after"] if container_data["restart_after"] else None
-                    )
-                    self.db.add(container)
-                    logger.info(f"Added container: {container_data['name']}")
-            except Exception as e:
-                logger.error(f"Error preparing container {container_data['name']}: {e}")
+        try:
+            changed_ids = self._upsert_containers(rows)
+            logger.info("Inserted or updated %s container records", len(changed_ids))
+        except Exception as e:
+            logger.error("Error preparing containers: %s", e)
         
         # Remove containers from database that no longer exist in demonstration data
-        db_containers = self.db.query(Container).all()
-        containers_to_remove = []
-        
-        for db_container in db_containers:
-            if db_container.container_id not in current_container_ids:
-                containers_to_remove.append(db_container)
-        
-        if containers_to_remove:
-            logger.info(f"Removing {len(containers_to_remove)} containers no longer in demonstration data:")
-            for container in containers_to_remove:
-                logger.info(f"  - Removing: {container.name} (ID: {container.container_id})")
-                self.db.delete(container)
+        removed = self.db.query(Container).filter(
+            Container.container_id.notin_(current_container_ids)
+        ).delete(synchronize_session=False)
+        if removed:
+            logger.info("Removed %s containers no longer in demonstration data", removed)
         
         try:
             self.db.commit()
             logger.info("Container configurations committed to database")
+            # Rebuilt lazily by get_containers_for_repository, only if a restart lookup follows
+            self._restart_index = None
         except Exception as e:
-            logger.error(f"Error saving containers: {e}")
+            logger.error("Error saving containers: %s", e)
             self.db.rollback()
         
         return all_containers
     
-    def _discover_real_containers(self) -> List[Dict]:
+    def _upsert_containers(self, rows: List[Dict]) -> List[str]:
+        """Insert or update container records with one INSERT ... ON CONFLICT statement per batch
+        
+        Returns the IDs of containers whose records were inserted or changed.
+        """
+        if not rows:
+            return []
+        if len(rows) > _UPSERT_BATCH_SIZE:
+            return [
+                container_id
+                for start in range(0, len(rows), _UPSERT_BATCH_SIZE)
+                for container_id in self._upsert_containers(rows[start:start + _UPSERT_BATCH_SIZE])
+            ]
+        
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            # No native upsert - look up existing rows once, then bulk insert/update
+            existing_rows = {
+                row.container_id: row
+                for row in self.db.query(
+                    Container.id, Container.container_id, *(getattr(Container, column) for column in _UPSERT_COLUMNS)
+                ).filter(
+                    Container.container_id.in_([row["container_id"] for row in rows])
+                ).all()
+            }
+            to_insert = [row for row in rows if row["container_id"] not in existing_rows]
+            # Skip rows whose stored values already match what Docker reports
+            to_update = [
+                {**row, "id": existing_rows[row["container_id"]].id, "updated_at": utcnow()}
+                for row in rows
+                if row["container_id"] in existing_rows and any(
+                    getattr(existing_rows[row["container_id"]], column) != row[column]
+                    for column in _UPSERT_COLUMNS
+                )
+            ]
+            if to_insert:
+                self.db.bulk_insert_mappings(Container, to_insert)
+            if to_update:
+                self.db.bulk_update_mappings(Container, to_update)
+            return [row["container_id"] for row in to_insert + to_update]
+        
+        stmt = insert(Container).values(rows)
+        update_columns = {column: stmt.excluded[column] for column in _UPSERT_COLUMNS}
+        update_columns["updated_at"] = utcnow()
+        # Only rewrite rows whose data actually changed since the last discovery
+        changed = or_(*(
+            getattr(Container, column).is_distinct_from(stmt.excluded[column])
+            for column in _UPSERT_COLUMNS
+        ))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["container_id"], set_=update_columns, where=changed
+        ).returning(Container.container_id)
+        return list(self.db.execute(stmt).scalars())
+    
+    def _discover_real_containers(self, label_filter: Optional[str] = None) -> List[Dict]:
         """Discover real Docker containers when Docker is available"""
         try:
-            containers = self.client.containers.list(all=True)
+            # The low-level listing returns plain dicts in one GET /containers/json,
+            # without the per-container inspect that containers.list() performs
+            if label_filter:
+                # Let the daemon filter instead of transferring every container
+                containers = self.client.api.containers(
+                    all=True, filters={"label": f"{_RESTART_LABEL}={label_filter}"}
+                )
+            else:
+                containers = self.client.api.containers(all=True)
             container_list = []
             current_container_ids = set()
             
+            rows = []
+            
             for container in containers:
                 # Support restart-after label format
-                labels = container.labels or {}
-                restart_after = labels.get("restart-after", "")
+                labels = container.get("Labels") or {}
+                restart_after = labels.get(_RESTART_LABEL, "")
+                names = container.get("Names") or []
                 
                 container_data = {
-                    "id": container.id,
-                    "name": container.name,
-                    "image": container.image.tags[0] if container.image.tags else "unknown",
-                    "status": container.status,
+                    "id": container["Id"],
+                    "name": names[0].lstrip("/") if names else container["Id"][:12],
+                    "image": container.get("Image") or "unknown",
+                    "status": container.get("State"),
                     "labels": labels,
                     "restart_after": restart_after
                 }
                 
                 container_list.append(container_data)
-                current_container_ids.add(container.id)
+                current_container_ids.add(container_data["id"])
                 
-                # Update or create container record in database
-                db_container = self.db.query(Container).filter(
-                    Container.container_id == container.id
-                ).first()
-                
-                if db_container:
-                    # Update existing record
-                    db_container.name = container.name
-                    db_container.image = container_data["image"]
-                    db_container.status = container.status
-                    db_container.labels = json.dumps(container.labels)
-                    db_container.restart_after_pull = restart_after
-                else:
-                    # Create new record
-                    db_container = Container(
-                        container_id=container.id,
-                        name=container.name,
-                        image=container_data["image"],
-                        status=container.status,
-                        labels=json.dumps(container.labels),
-                        restart_after_pull=container_data["restart_after"]
-                    )
-                    self.db.add(db_container)
-            
-            # Remove containers from database that no longer exist in Docker
-            db_containers = self.db.query(Container).all()
-            containers_to_remove = []
+                rows.append({
+                    "container_id": container_data["id"],
+                    "name": container_data["name"],
+                    "image": container_data["image"],
+                    "status": container_data["status"],
+                    "labels": _serialize_labels(labels),
+                    "restart_after_pull": restart_after,
+                    "repo_label": labels.get("repo")
+                })
             
-            for db_container in db_containers:
-                if db_container.container_id not in current_container_ids:
-                    containers_to_remove.append(db_container)
+            # Update or create all container records in a single statement
+            changed_ids = self._upsert_containers(rows)
+            logger.info("Inserted or updated %s container records", len(changed_ids))
             
-            if containers_to_remove:
-                logger.info(f"Removing {len(containers_to_remove)} containers that no longer exist in Docker:")
-                for container in containers_to_remove:
-                    logger.info(f"  - Removing: {container.name} (ID: {container.container_id})")
-                    self.db.delete(container)
+            # Remove containers from database that no longer exist in Docker
+            # (only a full listing tells us which containers are gone)
+            if not label_filter:
+                removed = self.db.query(Container).filter(
+                    Container.container_id.notin_(current_container_ids)
+                ).delete(synchronize_session=False)
+                if removed:
+                    logger.info("Removed %s containers that no longer exist in Docker", removed)
             
             self.db.commit()
-            logger.info(f"Discovered {len(container_list)} containers")
+            logger.info("Discovered %s containers", len(container_list))
+            # Rebuilt lazily by get_containers_for_repository, only if a restart lookup follows
+            self._restart_index = None
             
-            # Log containers with restart labels
-            restart_containers = [c for c in container_list if c.get('restart_after')]
-            if restart_containers:
-                logger.info(f"Found {len(restart_containers)} containers with restart labels:")
-                for c in restart_containers:
-                    logger.info(f"  - {c['name']}: will restart after '{c['restart_after']}' repository updates")
-            else:
-                logger.info("No containers found with restart labels")
+            # Log containers with restart labels (skip the extra pass when INFO is off)
+            if logger.isEnabledFor(logging.INFO):
+                restart_containers = [c for c in container_list if c.get('restart_after')]
+                if restart_containers:
+                    logger.info("Found %s containers with restart labels:", len(restart_containers))
+                    for c in restart_containers:
+                        logger.info("  - %s: will restart after '%s' repository updates", c['name'], c['restart_after'])
+                else:
+                    logger.info("No containers found with restart labels")
             
             return container_list
             
         except Exception as e:
-            logger.error(f"Failed to discover containers: {e}")
+            logger.error("Failed to discover containers: %s", e)
             return []
     
+    def _build_restart_index(self):
+        """Index restartable containers by each repository name in their restart_after_pull"""
+        all_containers = self.db.query(Container).filter(
+            Container.restart_after_pull.isnot(None),
+            Container.status.in_(["running", "exited"])  # Only restart manageable containers
+        ).all()
+        
+        restart_index = {}
+        for container in all_containers:
+            # Split comma-separated repository names
+            for name in container.restart_after_pull.split(","):
+                name = name.strip()
+                if name:
+                    restart_index.setdefault(name, []).append(container)
+        self._restart_index = restart_index
+    
     def get_containers_for_repository(self, repository_name: str) -> List[Container]:
         """Get containers that should be restarted for a specific repository"""
         try:
-            # Get all containers that might have comma-separated repository names
-            all_containers = self.db.query(Container).filter(
-                Container.restart_after_pull.isnot(None),
-                Container.status.in_(["running", "exited"])  # Only restart manageable containers
-            ).all()
-            
-            # Filter containers that include this repository name in their restart_after_pull
-            matching_containers = []
-            for container in all_containers:
-                if container.restart_after_pull:
-                    # Split comma-separated repository names and check if this repo is in the list
-                    repo_names = [name.strip() for name in container.restart_after_pull.split(",")]
-                    if repository_name in repo_names:
-                        matching_containers.append(container)
+            if self._restart_index is None:
+                self._build_restart_index()
+            matching_containers = list(self._restart_index.get(repository_name, []))
             
-            logger.info(f"Found {len(matching_containers)} containers to restart for repository {repository_name}")
+            logger.info("Found %s containers to restart for repository %s", len(matching_containers), repository_name)
             return matching_containers
             
         except Exception as e:
-            logger.error(f"Failed to get containers for repository {repository_name}: {e}")
+            logger.error("Failed to get containers for repository %s: %s", repository_name, e)
             return []
     
-    def restart_containers_by_label(self, repository_name: str) -> Tuple[int, List[str]]:
-        """Restart all Docker containers that have a specific restart-after label"""
+    def restart_containers_by_label(self, repository_name: str, commit: bool = True) -> Tuple[int, List[Dict[str, Any]]]:
+        """Restart all Docker containers that have a specific restart-after label; commit=False leaves the commit to the caller
+        
+        Returns the success count and one {name, success, message} entry per restart attempt;
+        an error that prevents any attempt is reported as an entry with name None.
+        """
         results = []
         success_count = 0
         
         if self.docker_available:
             try:
-                # Get all containers with restart-after labels
-                filters = {"label": "restart-after"}
-                all_containers = self.client.containers.list(filters=filters)
+                # Get all containers with restart-after labels as raw dicts - only id, name
+                # and labels are needed, so skip the per-container inspect of containers.list()
+                filters = {"label": _RESTART_LABEL}
+                all_containers = self.client.api.containers(filters=filters)
                 
                 # Filter containers that include this repository name in their restart-after label
                 matching_containers = []
                 for container in all_containers:
-                    restart_after_label = container.labels.get("restart-after", "")
+                    restart_after_label = (container.get("Labels") or {}).get(_RESTART_LABEL, "")
                     # Split comma-separated repository names and check if this repo is in the list
                     repo_names = [name.strip() for name in restart_after_label.split(",")]
                     if repository_name in repo_names:
-                        matching_containers.append(container)
+                        names = container.get("Names") or []
+                        name = names[0].lstrip("/") if names else container["Id"][:12]
+                        matching_containers.append((container["Id"], name))
                 
                 if not matching_containers:
-                    logger.info(f"No containers found with restart-after label containing: {repository_name}")
-                    return 0, [f"No containers found with restart-after label containing {repository_name}"]
+                    logger.info("No containers found with restart-after label containing: %s", repository_name)
+                    return 0, []
                 
                 containers = matching_containers
                 
-                for container in containers:
-                    try:
-                        logger.info(f"Restarting container {container.name}")
-                        container.restart()
+                # Restarts are I/O bound on the Docker socket - issue them concurrently
+                with ThreadPoolExecutor(max_workers=min(self.MAX_RESTART_WORKERS, len(containers))) as executor:
+                    outcomes = list(executor.map(self._restart_docker_container, containers))
+                
+                # Load all matching database records in one query
+                db_containers = {
+                    c.container_id: c
+                    for c in self.db.query(Container).filter(
+                        Container.container_id.in_([container_id for container_id, _ in containers])
+                    ).all()
+                }
+                
+                # Record results on the main thread - the DB session is not thread-safe
+                batch_ts = utcnow()
+                for (container_id, name), (success, message, error) in zip(containers, outcomes):
+                    results.append({"name": name, "success": success, "message": message})
+                    if success:
                         success_count += 1
-                        results.append(f"Successfully restarted container {container.name}")
-                        
-                        # Update database record if exists
-                        db_container = self.db.query(Container).filter_by(container_id=container.id).first()
-                        if db_container:
-                            db_container.last_restart_success = True
-                            db_container.last_restart_time = datetime.utcnow()
-                            db_container.last_restart_error = None
-                            
-                    except Exception as e:
-                        error_msg = f"Failed to restart {container.name}: {str(e)}"
-                        logger.error(error_msg)
-                        results.append(error_msg)
-                        
-                        # Update database record if exists
-                        db_container = self.db.query(Container).filter_by(container_id=container.id).first()
-                        if db_container:
-                            db_container.last_restart_success = False
-                            db_container.last_restart_time = datetime.utcnow()
-                            db_container.last_restart_error = error_msg
+                    else:
+                        self._invalidate_docker_connection(error)
+                    
+                    # Update database record if exists
+                    db_container = db_containers.get(container_id)
+                    if db_container:
+                        db_container.last_restart_success = success
+                        db_container.last_restart_time = batch_ts
+                        db_container.last_restart_error = None if success else message
                 
-                self.db.commit()
+                if commit:
+                    self.db.commit()
                 
             except Exception as e:
                 error_msg = f"Error accessing Docker API: {str(e)}"
                 logger.error(error_msg)
-                results.append(error_msg)
+                results.append({"name": None, "success": False, "message": error_msg})
+                self._invalidate_docker_connection(e)
         else:
             # Fallback to database-tracked containers when Docker API unavailable
             containers = self.get_containers_for_repository(repository_name)
             if not containers:
-                return 0, [f"No containers configured for repository {repository_name}"]
+                logger.info("No containers configured for repository %s", repository_name)
+                return 0, []
             
+            batch_ts = utcnow()
             for container in containers:
-                success, message = self.restart_container(container)
+                success, message = self.restart_container(container, commit=False, ts=batch_ts)
                 if success:
                     success_count += 1
-                    results.append(f"Restarted {container.name}: {message}")
+                    results.append({"name": container.name, "success": True, "message": f"Restarted {container.name}: {message}"})
                 else:
-                    results.append(f"Failed {container.name}: {message}")
+                    results.append({"name": container.name, "success": False, "message": f"Failed {container.name}: {message}"})
+            self._flush_logs(commit=commit)
         
         return success_count, results
     
-    def restart_container(self, container: Container) -> Tuple[bool, str]:
-        """Restart a Docker container"""
+    async def restart_containers_by_label_async(self, repository_name: str, commit: bool = True) -> Tuple[int, List[Dict[str, Any]]]:
+        """Async variant of restart_containers_by_label that keeps the event loop free
+        
+        The blocking Docker calls run in a worker thread, where they fan out over the
+        restart thread pool and the shared client's connection pool.
+        """
+        return await asyncio.to_thread(self.restart_containers_by_label, repository_name, commit)
+    
+    def _restart_docker_container(self, container: Tuple[str, str]) -> Tuple[bool, str, Optional[Exception]]:
+        """Restart a (container_id, name) container via the low-level API; safe to call from worker threads"""
+        container_id, name = container
+        try:
+            logger.info("Restarting container %s", name)
+            _call_with_retry(self.client.api.restart, container_id, timeout=10)
+            return True, f"Successfully restarted container {name}", None
+        except Exception as e:
+            error_msg = f"Failed to restart {name}: {str(e)}"
+            logger.error(error_msg)
+            return False, error_msg, e
+    
+    def _record_log(self, log_entry: OperationLog, commit: bool = True):
+        """Add an operation log entry, either committing now or queueing it for _flush_logs()"""
+        if commit:
+            self.db.add(log_entry)
+            self.db.commit()
+        else:
+            self._pending_logs.append(log_entry)
+    
+    def _flush_logs(self, commit: bool = True):
+        """Write queued operation log entries and pending record updates in one commit"""
+        if self._pending_logs:
+            self.db.add_all(self._pending_logs)
+            self._pending_logs = []
+        if commit:
+            self.db.commit()
+    
+    @classmethod
+    def _resolve_docker_cli(cls) -> Optional[str]:
+        """Find the docker binary; a found path is remembered for the life of the process"""
+        if cls._docker_cli is not None:
+            return cls._docker_cli
+        for docker_cmd in _DOCKER_CLI_CANDIDATES:
+            if os.path.isabs(docker_cmd):
+                path = docker_cmd if os.access(docker_cmd, os.X_OK) else None
+            else:
+                path = shutil.which(docker_cmd)
+            if path:
+                cls._docker_cli = path
+                return path
+        return None
+    
+    def _restart_via_raw_socket(self, container_id: str) -> Tuple[bool, str]:
+        """Restart a container with a single POST to the Docker socket, bypassing docker-py"""
+        conn = _UnixHTTPConnection(_DOCKER_SOCKET_PATH, timeout=30)
+        try:
+            conn.request("POST", f"/containers/{container_id}/restart?t=10")
+            response = conn.getresponse()
+            body = response.read().decode(errors="replace").strip()
+            if response.status == 204:
+                return True, "restarted"
+            return False, f"Docker socket returned HTTP {response.status}: {body}"
+        except OSError as e:
+            return False, f"Docker socket request failed: {e}"
+        finally:
+            conn.close()
+    
+    def restart_container(self, container: Container, commit: bool = True,
+                          ts: Optional[datetime] = None) -> Tuple[bool, str]:
+        """Restart a Docker container
+        
+        With commit=False the operation log is queued and the caller must call _flush_logs().
+        Batch callers pass one ts so every container shares the same restart timestamp.
+        """
+        restart_time = ts or utcnow()
         try:
             if self.docker_available:
                 try:
-                    # Try direct Docker restart
-                    docker_container = self.client.containers.get(container.container_id)
-                    logger.info(f"Restarting container {container.name} ({container.container_id})")
-                    docker_container.restart()
+                    # Restart by ID directly - skips the inspect round-trip of containers.get()
+                    logger.info("Restarting container %s (%s)", container.name, container.container_id)
+                    _call_with_retry(self.client.api.restart, container.container_id, timeout=10)
                     success_msg = f"Successfully restarted container {container.name} via Docker API"
                 except docker.errors.NotFound:
                     error_msg = f"Container {container.name} ({container.container_id}) not found in Docker"
                     logger.error(error_msg)
                     
                     container.last_restart_success = False
-                    container.last_restart_time = datetime.utcnow()
+                    container.last_restart_time = restart_time
                     container.last_restart_error = error_msg
                     
                     # Log operation
@@ -453,8 +723,7 @@ class DockerService:
                         message=f"Container {container.name} not found",
                         details=error_msg
                     )
-                    self.db.add(log_entry)
-                    self.db.commit()
+                    self._record_log(log_entry, commit)
                     
                     return False, error_msg
                 except docker.errors.APIError as e:
@@ -462,7 +731,7 @@ class DockerService:
                     logger.error(error_msg)
                     
                     container.last_restart_success = False
-                    container.last_restart_time = datetime.utcnow()
+                    container.last_restart_time = restart_time
                     container.last_restart_error = error_msg
                     
                     # Log operation
@@ -473,34 +742,31 @@ class DockerService:
                         message=f"Docker API error restarting container {container.name}",
                         details=error_msg
                     )
-                    self.db.add(log_entry)
-                    self.db.commit()
+                    self._record_log(log_entry, commit)
                     
                     return False, error_msg
             else:
                 # Try different methods to restart container when API not available
-                logger.info(f"Attempting container restart for {container.name} using fallback methods")
-                
-                # Method 1: Try docker command with different paths
-                docker_paths = [
-                    '/usr/bin/docker',
-                    '/usr/local/bin/docker', 
-                    'docker'
-                ]
+                logger.info("Attempting container restart for %s using fallback methods", container.name)
                 
                 success = False
                 error_msg = None
                 
-                for docker_cmd in docker_paths:
+                # Method 1: Talk to the daemon socket directly - no process spawn
+                if os.path.exists(_DOCKER_SOCKET_PATH):
+                    success, message = self._restart_via_raw_socket(container.container_id)
+                    if success:
+                        success_msg = f"Successfully restarted container {container.name} via Docker socket"
+                        logger.info(success_msg)
+                    else:
+                        error_msg = message
+                        logger.warning("Docker socket restart failed for %s: %s", container.name, message)
+                
+                # Method 2: Try the docker command line
+                docker_cmd = self._resolve_docker_cli() if not success else None
+                if docker_cmd:
                     try:
-                        # Check if docker command exists
-                        if docker_cmd == 'docker':
-                            if not shutil.which('docker'):
-                                continue
-                        elif not os.path.exists(docker_cmd):
-                            continue
-                            
-                        logger.info(f"Trying docker restart with command: {docker_cmd}")
+                        logger.info("Trying docker restart with command: %s", docker_cmd)
                         result = subprocess.run([docker_cmd, 'restart', str(container.container_id)], 
                                               capture_output=True, text=True, timeout=30)
                         
@@ -508,29 +774,22 @@ class DockerService:
                             success_msg = f"Successfully restarted container {container.name} via {docker_cmd}"
                             logger.info(success_msg)
                             success = True
-                            break
                         else:
                             error_msg = f"Docker restart failed: {result.stderr.strip()}"
-                            logger.warning(f"Docker command {docker_cmd} failed: {error_msg}")
-                            
+                            logger.warning("Docker command %s failed: %s", docker_cmd, error_msg)
+                    
                     except subprocess.TimeoutExpired:
                         error_msg = f"Docker restart command timed out for {container.name}"
                         logger.warning(error_msg)
-                        continue
-                        
-                    except FileNotFoundError:
-                        logger.debug(f"Docker command not found at {docker_cmd}")
-                        continue
-                        
+                    
                     except Exception as e:
                         error_msg = f"Error with docker command {docker_cmd}: {str(e)}"
                         logger.warning(error_msg)
-                        continue
                 
                 if not success:
-                    # Method 2: Try docker-compose restart if available
+                    # Method 3: Try docker-compose restart if available
                     try:
-                        logger.info(f"Trying docker-compose restart for {container.name}")
+                        logger.info("Trying docker-compose restart for %s", container.name)
                         result = subprocess.run(['docker-compose', 'restart', str(container.name)], 
                                               capture_output=True, text=True, timeout=30)
                         if result.returncode == 0:
@@ -538,20 +797,20 @@ class DockerService:
                             logger.info(success_msg)
                             success = True
                         else:
-                            logger.debug(f"docker-compose restart failed: {result.stderr}")
-                    except:
-                        logger.debug("docker-compose restart failed")
+                            logger.debug("docker-compose restart failed: %s", result.stderr)
+                    except (OSError, subprocess.SubprocessError) as e:
+                        logger.debug("docker-compose restart failed: %s", e)
                 
                 if not success:
                     # Final fallback - report the issue with diagnostic info
-                    diagnostic_info = f"Docker socket accessible: {os.path.exists('/var/run/docker.sock')}, "
+                    diagnostic_info = f"Docker socket accessible: {os.path.exists(_DOCKER_SOCKET_PATH)}, "
                     diagnostic_info += f"Last Docker error: {self.docker_error or 'Unknown'}"
                     
                     final_error = f"Cannot restart container {container.name} - no working Docker method found. {diagnostic_info}"
                     logger.error(final_error)
                     
                     container.last_restart_success = False
-                    container.last_restart_time = datetime.utcnow()
+                    container.last_restart_time = restart_time
                     container.last_restart_error = final_error
                     
                     # Log operation
@@ -562,16 +821,13 @@ class DockerService:
                         message=f"Failed to restart container {container.name}",
                         details=final_error
                     )
-                    self.db.add(log_entry)
-                    self.db.commit()
+                    self._record_log(log_entry, commit)
                     
                     return False, final_error
-                    
-                success_msg = f"Successfully restarted container {container.name} via command line"
             
             # Update container record
             container.last_restart_success = True
-            container.last_restart_time = datetime.utcnow()
+            container.last_restart_time = restart_time
             container.last_restart_error = None
             if self.docker_available:
                 container.status = "running"
@@ -584,8 +840,7 @@ class DockerService:
                 message=f"Successfully restarted container {container.name}",
                 details=f"Container ID: {container.container_id}, Docker available: {self.docker_available}"
             )
-            self.db.add(log_entry)
-            self.db.commit()
+            self._record_log(log_entry, commit)
             
             logger.info(success_msg)
             return True, success_msg
@@ -593,9 +848,10 @@ class DockerService:
         except Exception as e:
             error_msg = f"Unexpected error restarting container {container.name}: {str(e)}"
             logger.error(error_msg)
+            self._invalidate_docker_connection(e)
             
             container.last_restart_success = False
-            container.last_restart_time = datetime.utcnow()
+            container.last_restart_time = restart_time
             container.last_restart_error = error_msg
             
             # Log operation
@@ -606,8 +862,7 @@ class DockerService:
                 message=f"Failed to restart container {container.name}",
                 details=error_msg
             )
-            self.db.add(log_entry)
-            self.db.commit()
+            self._record_log(log_entry, commit)
             
             return False, error_msg
     
@@ -616,9 +871,11 @@ class DockerService:
         results = []
         containers = self.get_containers_for_repository(repository_name)
         
+        batch_ts = utcnow()
         for container in containers:
-            success, message = self.restart_container(container)
+            success, message = self.restart_container(container, commit=False, ts=batch_ts)
             results.append((container.name, success, message))
+        self._flush_logs()
         
         return results
     
@@ -628,21 +885,22 @@ class DockerService:
             return None
         
         try:
-            container = self.client.containers.get(container_id)
+            # One inspect call - the image name is in Config, no separate image lookup
+            attrs = self.client.api.inspect_container(container_id)
             return {
-                "id": container.id,
-                "name": container.name,
-                "status": container.status,
-                "image": container.image.tags[0] if container.image.tags else "unknown",
-                "created": container.attrs["Created"],
-                "started": container.attrs["State"].get("StartedAt"),
-                "labels": container.labels,
-                "ports": container.ports,
-                "mounts": [mount["Source"] + ":" + mount["Destination"] for mount in container.attrs["Mounts"]]
+                "id": attrs["Id"],
+                "name": attrs["Name"].lstrip("/"),
+                "status": attrs["State"]["Status"],
+                "image": attrs["Config"].get("Image") or "unknown",
+                "created": attrs["Created"],
+                "started": attrs["State"].get("StartedAt"),
+                "labels": attrs["Config"].get("Labels") or {},
+                "ports": attrs["NetworkSettings"].get("Ports") or {},
+                "mounts": [mount["Source"] + ":" + mount["Destination"] for mount in attrs["Mounts"]]
             }
             
         except Exception as e:
-            logger.error(f"Failed to get container status for {container_id}: {e}")
+            logger.error("Failed to get container status for %s: %s", container_id, e)
             return None
     
     def is_docker_available(self) -> bool:
@@ -657,5 +915,5 @@ class DockerService:
         try:
             return self.client.info()
         except Exception as e:
-            logger.error(f"Failed to get Docker info: {e}")
+            logger.error("Failed to get Docker info: %s", e)
             return None
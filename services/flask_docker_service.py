@@ -1,11 +1,39 @@
 import docker
-import os
-import subprocess
+import docker.errors
+import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple, Dict, Any
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Upper bound on concurrent container restarts per webhook
+MAX_RESTART_WORKERS = 16
+DOCKER_POOL_SIZE = 32
+
+# Label naming the repositories whose pushes restart a container
+_RESTART_LABEL = "restart-after"
+_RESTART_LABEL_PREFIX = _RESTART_LABEL + "="
+
+# Seconds dockerd waits for a container to stop before killing it on restart
+RESTART_STOP_TIMEOUT = 10
+
+# Seconds to wait before re-subscribing to Docker events after the stream drops
+EVENTS_RETRY_INTERVAL = 30
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def _container_name(container: Dict[str, Any]) -> str:
+    """Name of a raw /containers/json entry, without the leading slash"""
+    names = container.get("Names") or []
+    return names[0].lstrip("/") if names else container["Id"][:12]
+
+
 class FlaskDockerService:
     """
     Docker service using the exact pattern from your working GitHub repository
@@ -15,66 +43,132 @@ class FlaskDockerService:
     def __init__(self):
         try:
             # Use the exact same pattern as your working Flask example
-            self.client = docker.from_env()  # Connect to Docker daemon
+            # Connect to Docker daemon; a larger keep-alive pool lets concurrent restarts reuse sockets
+            self.client = docker.from_env(max_pool_size=DOCKER_POOL_SIZE)
             self.docker_available = True
             logger.info("Docker client initialized successfully using Flask pattern")
         except Exception as e:
             self.client = None
             self.docker_available = False
             logger.error(f"Docker initialization failed: {e}")
+        
+        # "key=value" label -> {container_id: name}, kept current from the Docker events stream
+        self._label_index = {}
+        self._indexed_labels = {}
+        self._running = set()
+        self._label_index_lock = threading.Lock()
+        self._label_index_ready = False
+        if self.docker_available:
+            threading.Thread(target=self._event_loop, name="docker-events", daemon=True).start()
+    def _index_container(self, container_id: str, name: str, labels: Dict[str, str], running: bool):
+        """Add or refresh a container in the label index"""
+        keys = [f"{key}={value}" for key, value in (labels or {}).items()]
+        with self._label_index_lock:
+            self._unindex_container_locked(container_id)
+            for key in keys:
+                self._label_index.setdefault(key, {})[container_id] = name
+            self._indexed_labels[container_id] = keys
+            if running:
+                self._running.add(container_id)
+    
+    def _unindex_container_locked(self, container_id: str):
+        self._running.discard(container_id)
+        for key in self._indexed_labels.pop(container_id, []):
+            containers = self._label_index.get(key)
+            if containers is not None:
+                containers.pop(container_id, None)
+                if not containers:
+                    del self._label_index[key]
+    
+    def _seed_label_index(self):
+        """Rebuild the label index from a single container listing"""
+        containers = self.client.api.containers(all=True)
+        with self._label_index_lock:
+            self._label_index = {}
+            self._indexed_labels = {}
+            self._running = set()
+        for container in containers:
+            self._index_container(
+                container["Id"], _container_name(container), container.get("Labels"), container.get("State") == "running"
+            )
+        self._label_index_ready = True
+    
+    def _event_loop(self):
+        """Keep the label index in sync with container lifecycle events"""
+        while True:
+            try:
+                # Subscribe before seeding so no event between the two is missed
+                events = self.client.events(
+                    decode=True,
+                    filters={"type": "container", "event": ["create", "rename", "start", "die", "destroy"]}
+                )
+                self._seed_label_index()
+                for event in events:
+                    container_id = event.get("id")
+                    if not container_id:
+                        continue
+                    action = event.get("Action")
+                    if action == "destroy":
+                        with self._label_index_lock:
+                            self._unindex_container_locked(container_id)
+                        continue
+                    if action in ("start", "die") and container_id in self._indexed_labels:
+                        with self._label_index_lock:
+                            if action == "start":
+                                self._running.add(container_id)
+                            else:
+                                self._running.discard(container_id)
+                        continue
+                    try:
+                        attrs = self.client.api.inspect_container(container_id)
+                        self._index_container(
+                            container_id, attrs["Name"].lstrip("/"), attrs["Config"].get("Labels"),
+                            attrs["State"].get("Running", False)
+                        )
+                    except docker.errors.NotFound:
+                        with self._label_index_lock:
+                            self._unindex_container_locked(container_id)
+            except Exception as e:
+                logger.warning(f"Docker events stream interrupted, label index disabled: {e}")
+            self._label_index_ready = False
+            time.sleep(EVENTS_RETRY_INTERVAL)
+    
+    def _containers_with_label(self, label_filter: str, include_stopped: bool = False) -> List[Tuple[str, str]]:
+        """(container_id, name) pairs carrying label_filter, from the index when it is live"""
+        if self._label_index_ready:
+            with self._label_index_lock:
+                return [
+                    (container_id, name)
+                    for container_id, name in self._label_index.get(label_filter, {}).items()
+                    if include_stopped or container_id in self._running
+                ]
+        # Listing only running containers spares dockerd from encoding the stopped backlog
+        containers = self.client.api.containers(all=include_stopped, filters={"label": label_filter})
+        return [(container["Id"], _container_name(container)) for container in containers]
     
     def extract_repo_name(self, repo_url: str) -> str:
         """Extract repository name from Git URL - exact copy from your code"""
         if not repo_url:
             return None
         # Example: "git@github.com:user/odoo-project.git" -> "odoo-project"
-        return repo_url.split("/")[-1].replace(".git", "")
+        tail = repo_url.rpartition("/")[2]
+        return tail[:-4] if tail.endswith(".git") else tail
     
-    def pull_repo(self, repo_dir: str, repo_url: str) -> Tuple[bool, str]:
-        """Clone or pull Git repository - exact copy from your code"""
-        try:
-            if not os.path.isdir(repo_dir):
-                logger.info(f"Cloning repo {repo_url} into {repo_dir}")
-                subprocess.run(["git", "clone", repo_url, repo_dir], check=True)
-                return True, f"Successfully cloned {repo_url}"
-            else:
-                logger.info(f"Pulling latest changes in {repo_dir}")
-                subprocess.run(["git", "-C", repo_dir, "pull"], check=True)
-                return True, f"Successfully pulled latest changes"
-        except subprocess.CalledProcessError as e:
-            error_msg = f"Git command failed: {str(e)}"
-            logger.error(error_msg)
-            return False, error_msg
-        except Exception as e:
-            error_msg = f"Git operation error: {str(e)}"
-            logger.error(error_msg)
-            return False, error_msg
-    
-    def restart_containers_by_repo_label(self, repo_name: str) -> Tuple[int, List[str]]:
+    def restart_containers_by_repo_label(self, repo_name: str, include_stopped: bool = False) -> Tuple[int, List[str]]:
         """
         Restart all Docker containers that have repo label matching repo name
         Uses your exact pattern: repo={repo_name}
         """
         if not self.docker_available:
             # In demonstration mode, simulate container restart with database lookup
-            from database import get_db_session
+            from database import get_scoped_session
             from models import Container
-            import json
             
-            db = get_db_session()
+            # The calling thread's session is reused across calls; close() only releases the connection
+            db = get_scoped_session()
             try:
-                # Find containers with matching repo label in database
-                containers = db.query(Container).all()
-                matching_containers = []
-                
-                for container in containers:
-                    if container.labels:
-                        try:
-                            labels = json.loads(container.labels)
-                            if labels.get("repo") == repo_name:
-                                matching_containers.append(container)
-                        except:
-                            continue
+                # Find containers with matching repo label in database (indexed column)
+                matching_containers = db.query(Container).filter(Container.repo_label == repo_name).all()
                 
                 if not matching_containers:
                     message = f"No containers found with label repo={repo_name} (demonstration mode)"
@@ -82,48 +176,100 @@ class FlaskDockerService:
                     return 0, [message]
                 
                 # Simulate successful restart for demonstration
-                results = []
-                for container in matching_containers:
-                    message = f"Successfully restarted container: {container.name} (demonstration mode)"
-                    results.append(message)
-                    logger.info(message)
+                names = [container.name for container in matching_containers]
+                results = [f"Successfully restarted container: {name} (demonstration mode)" for name in names]
+                logger.info("Restarted %d containers for %s (demonstration mode): %s", len(names), repo_name, names)
                 
                 return len(matching_containers), results
                 
             finally:
                 db.close()
         
-        results = []
-        success_count = 0
+        return self.restart_containers_batch([repo_name], include_stopped=include_stopped)[repo_name]
+    
+    def _containers_by_repo_label(
+        self, repo_names: List[str], include_stopped: bool = False
+    ) -> Dict[str, List[Tuple[str, str]]]:
+        """Map each repo name to its restart-after (container_id, name) pairs with at most one listing"""
+        if self._label_index_ready:
+            return {
+                repo_name: self._containers_with_label(_RESTART_LABEL_PREFIX + repo_name, include_stopped)
+                for repo_name in repo_names
+            }
         
+        # Docker ANDs multiple label filters, so list by label key once and group on the value
+        grouped = {repo_name: [] for repo_name in repo_names}
+        for container in self.client.api.containers(all=include_stopped, filters={"label": _RESTART_LABEL}):
+            repo_name = (container.get("Labels") or {}).get(_RESTART_LABEL)
+            if repo_name in grouped:
+                grouped[repo_name].append((container["Id"], _container_name(container)))
+        return grouped
+    
+    def restart_containers_batch(
+        self, repo_names: List[str], include_stopped: bool = False
+    ) -> Dict[str, Tuple[int, List[str]]]:
+        """
+        Restart the running restart-after containers of several repositories in one pass
+        Returns (success_count, messages) per repo name; include_stopped also restarts stopped ones
+        """
+        if not self.docker_available:
+            return {repo_name: self.restart_containers_by_repo_label(repo_name) for repo_name in repo_names}
+        
+        outcomes = {}
         try:
-            # Use the correct restart-after label pattern
-            label_filter = f"restart-after={repo_name}"
-            containers = self.client.containers.list(all=True, filters={"label": label_filter})
-            
-            if not containers:
-                message = f"No containers found with label: {label_filter}"
-                logger.info(message)
-                return 0, [message]
-            
-            # Restart each container using your exact pattern
-            for container in containers:
-                try:
-                    logger.info(f"Restarting container: {container.name}")
-                    container.restart()
-                    success_count += 1
-                    results.append(f"Successfully restarted container: {container.name}")
-                except Exception as e:
-                    error_msg = f"Error restarting {container.name}: {e}"
-                    logger.error(error_msg)
-                    results.append(error_msg)
-                    
+            grouped = self._containers_by_repo_label(repo_names, include_stopped)
         except Exception as e:
-            error_msg = f"Failed to restart containers with repo label {repo_name}: {e}"
-            logger.error(error_msg)
-            results.append(error_msg)
-            
-        return success_count, results
+            for repo_name in repo_names:
+                error_msg = f"Failed to restart containers with repo label {repo_name}: {e}"
+                logger.error(error_msg)
+                outcomes[repo_name] = (0, [error_msg])
+            return outcomes
+        
+        jobs = []
+        for repo_name in repo_names:
+            if grouped[repo_name]:
+                jobs.extend((repo_name, container) for container in grouped[repo_name])
+            else:
+                outcomes[repo_name] = (0, ["No containers found with label: " + _RESTART_LABEL_PREFIX + repo_name])
+        
+        # Restart every matched container concurrently - the daemon handles parallel restarts
+        if len(jobs) == 1:
+            restarted = [self._restart_container(jobs[0][1])]
+        elif jobs:
+            with ThreadPoolExecutor(max_workers=min(MAX_RESTART_WORKERS, len(jobs))) as executor:
+                restarted = list(executor.map(self._restart_container, [container for _, container in jobs]))
+        else:
+            restarted = []
+        
+        restarted_names = defaultdict(list)
+        for (repo_name, (_, name)), (success, message) in zip(jobs, restarted):
+            success_count, results = outcomes.get(repo_name, (0, []))
+            results.append(message)
+            outcomes[repo_name] = (success_count + success, results)
+            if success:
+                restarted_names[repo_name].append(name)
+        
+        # One summary line per batch instead of a log call per container
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Restarted %d containers: %s; no containers for: %s",
+                sum(len(names) for names in restarted_names.values()),
+                dict(restarted_names),
+                [repo_name for repo_name in repo_names if not grouped[repo_name]],
+            )
+        
+        return outcomes
+
+    def _restart_container(self, container: Tuple[str, str]) -> Tuple[bool, str]:
+        """Restart a single (container_id, name) container; safe to call from worker threads"""
+        container_id, name = container
+        try:
+            logger.debug("Restarting container: %s", name)
+            self.client.api.restart(container_id, timeout=RESTART_STOP_TIMEOUT)
+            return True, f"Successfully restarted container: {name}"
+        except Exception as e:
+            logger.error("Error restarting %s: %s", name, e)
+            return False, f"Error restarting {name}: {e}"
 
     def restart_containers(self, label: str) -> Tuple[int, List[str]]:
         """
@@ -131,43 +277,6 @@ class FlaskDockerService:
         """
         return self.restart_containers_by_repo_label(label)
     
-    def process_webhook_like_flask(self, repo_name: str, repo_config: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Process webhook exactly like your Flask implementation
-        """
-        result = {
-            "success": False,
-            "message": "",
-            "git_result": "",
-            "container_results": []
-        }
-        
-        try:
-            # Step 1: Pull repository (exact Flask pattern)
-            pull_success, pull_message = self.pull_repo(repo_config["dir"], repo_config["url"])
-            result["git_result"] = pull_message
-            
-            if not pull_success:
-                result["message"] = f"Git command failed: {pull_message}"
-                return result
-            
-            # Step 2: Restart containers (exact Flask pattern)
-            success_count, restart_results = self.restart_containers(repo_config["label"])
-            result["container_results"] = restart_results
-            
-            if success_count > 0:
-                result["success"] = True
-                result["message"] = f"Updated and restarted containers for {repo_name}"
-            else:
-                result["message"] = f"Repository updated but no containers restarted for {repo_name}"
-            
-            return result
-            
-        except Exception as e:
-            result["message"] = f"Error: {str(e)}"
-            logger.error(f"Webhook processing error: {e}")
-            return result
-    
     def get_containers_with_label(self, label: str) -> List:
         """Get all containers with a specific label"""
         if not self.docker_available:
@@ -177,4 +286,13 @@ class FlaskDockerService:
             return self.client.containers.list(filters={"label": label})
         except Exception as e:
             logger.error(f"Error getting containers: {e}")
-            return []
\ No newline at end of file
+            return []
+
+
+def get_flask_docker_service() -> FlaskDockerService:
+    """Return the shared FlaskDockerService, creating it again only while Docker is unavailable"""
+    global _service
+    with _service_lock:
+        if _service is None or not _service.docker_available:
+            _service = FlaskDockerService()
+        return _service
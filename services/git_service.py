@@ -1,24 +1,258 @@
+import hashlib
 import os
+import re
 import subprocess
 import shutil
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Tuple
-from datetime import datetime
-from git import Repo, GitCommandError
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+from functools import lru_cache
+from git import GitCommandError
 from sqlalchemy.orm import Session
 from models import Repository, OperationLog, GitKey, Setting
 from utils.logger import setup_logger
-from utils.helpers import extract_repo_name_from_url
+from utils.helpers import extract_repo_name_from_url, utcnow
 
 logger = setup_logger(__name__)
 
+# ~/.ssh key and config files are shared by every GitService; write them one thread at a time
+_ssh_setup_lock = threading.Lock()
+# Seconds the active Git key lookup is reused across GitService instances
+ACTIVE_KEY_TTL = 60.0
+
+# Seconds a successful validate_repository_url check is reused, keyed by (url, active git key id)
+VALIDATE_CACHE_TTL = 60.0
+_validate_cache: Dict[Tuple[str, Optional[int]], float] = {}
+# Digest of the private key last written to ~/.ssh, so unchanged keys are not rewritten
+_written_key_digest = None
+
+# Directories never worth descending into when looking for repositories
+_SKIP_DIRS = frozenset({'.git', 'node_modules', '.cache', '__pycache__', 'proc', 'sys', 'dev', 'run'})
+
+# Subdirectory names that mark a directory as holding repositories
+_REPO_MARKERS = frozenset({'server-backend', '.git'})
+
+# Clone failure classes found in a single scan of the error message
+_CLONE_ERROR_RE = re.compile(
+    r"(?P<read_only>Read-only file system)|(?P<permission>Permission denied)|(?P<missing>No such file or directory)"
+)
+
+# Clone options used when the shallow_clone setting is on
+_SHALLOW_CLONE_OPTIONS = ['--depth=1', '--single-branch', '--no-tags']
+
+# ~/.ssh/config written with the key; connection sharing is set by _ssh_command for every host
+_SSH_CONFIG_TEMPLATE = """
+Host github.com
+    HostName github.com
+    User git
+    IdentityFile {key_file}
+    StrictHostKeyChecking no
+"""
+
+# Passed to every git run: wire protocol v2 advertises only the refs asked for, and
+# manyFiles turns on the faster index format and untracked cache for checkouts
+_GIT_CONFIG_OPTIONS = ['-c', 'protocol.version=2', '-c', 'feature.manyFiles=true']
+
+# HTTPS probes negotiate HTTP/2 and give up on a stalled transfer well before the 30s timeout
+_HTTP_PROBE_OPTIONS = ['-c', 'http.version=HTTP/2', '-c', 'http.lowSpeedLimit=1000', '-c', 'http.lowSpeedTime=5']
+
+# Seconds allowed for a single clone or fetch
+GIT_TIMEOUT = 600
+# Characters of git stderr kept in errors, logs and OperationLog details
+GIT_STDERR_LIMIT = 4096
+
+def _fetch_depth(repo_path: str) -> List[str]:
+    """Fetch options that keep a shallow clone shallow and tag-free"""
+    return ['--depth=1', '--no-tags'] if os.path.exists(os.path.join(repo_path, '.git', 'shallow')) else []
+
+def _branch_refspec(branch: str) -> str:
+    """Refspec that updates origin/<branch> even in a single-branch clone tracking another branch"""
+    return f'+refs/heads/{branch}:refs/remotes/origin/{branch}'
+
+def _run_git(args: List[str], ssh_command: Optional[str] = None, cwd: Optional[str] = None) -> str:
+    """Run git directly, never prompting for credentials; raise GitCommandError with stderr on failure"""
+    env = os.environ.copy()
+    env['GIT_TERMINAL_PROMPT'] = '0'
+    if ssh_command:
+        env['GIT_SSH_COMMAND'] = ssh_command
+    cmd = ['git', *_GIT_CONFIG_OPTIONS, *args] if cwd is None else ['git', '-C', cwd, *_GIT_CONFIG_OPTIONS, *args]
+    # stderr goes to a file, not a pipe: an SSH control master spawned by this run inherits it and
+    # outlives git, and reading a pipe would wait for the master to exit
+    with tempfile.TemporaryFile(mode='w+') as stderr_file:
+        result = subprocess.run(
+            cmd, env=env, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=stderr_file, text=True,
+            timeout=GIT_TIMEOUT, start_new_session=True
+        )
+        if result.returncode != 0:
+            stderr_file.seek(0)
+            # Keep the tail - git prints the fatal line last - and bound what error messages carry
+            raise GitCommandError(cmd, result.returncode, stderr_file.read()[-GIT_STDERR_LIMIT:])
+    return result.stdout
+
+@lru_cache(maxsize=1)
+def _discover_ssh_keygen() -> str:
+    """Locate the ssh-keygen binary; the answer does not change while the process runs"""
+    # Try common paths
+    for path in ("/usr/bin/ssh-keygen", "/bin/ssh-keygen"):
+        if os.path.exists(path):
+            return path
+    
+    # Nix store - stop at the first package providing ssh-keygen instead of globbing them all
+    if os.path.isdir("/nix/store"):
+        with os.scandir("/nix/store") as entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                candidate = os.path.join(entry.path, "bin", "ssh-keygen")
+                if os.path.exists(candidate):
+                    return candidate
+    
+    # Fall back to a PATH lookup, done in-process
+    path = shutil.which("ssh-keygen")
+    if path:
+        return path
+    raise Exception("ssh-keygen not found in system PATH")
+
+def _ssh_command(key_file: str) -> str:
+    """GIT_SSH_COMMAND for key_file; connections to a host share one multiplexed SSH session
+    
+    The first git operation per host pays the full handshake; later ones within
+    ControlPersist reuse the master connection.
+    """
+    return (
+        f'ssh -i {key_file} -o StrictHostKeyChecking=no'
+        ' -o ControlMaster=auto -o ControlPath=~/.ssh/cm-%r@%h:%p -o ControlPersist=10m'
+    )
+
+def _key_digest(private_key: str) -> str:
+    """Short content hash of a private key"""
+    return hashlib.blake2b(private_key.encode(), digest_size=16).hexdigest()
+
+def _write_file_atomic(path: Path, content: str, mode: int):
+    """Write content next to path and rename it into place so readers never see a partial file"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        f.write(content)
+    os.chmod(tmp_path, mode)
+    os.replace(tmp_path, path)
+
+def _is_writable(path: str) -> bool:
+    """Whether path exists and is writable; access() fails with ENOENT, so no separate exists() stat"""
+    return os.access(path, os.W_OK)
+
+def _docker_volume_candidates(volumes_root: str = "/var/lib/docker/volumes") -> List[str]:
+    """Candidate repo paths for <volumes_root>/*/data, repo_storage/_data and *_repo_storage/_data"""
+    try:
+        with os.scandir(volumes_root) as it:
+            # Skip hidden entries like glob's "*" does
+            volumes = sorted(
+                entry.name for entry in it if not entry.name.startswith(".") and entry.is_dir(follow_symlinks=False)
+            )
+    except OSError:
+        return []
+    
+    candidates = [os.path.join(volumes_root, name, "data") for name in volumes]
+    if "repo_storage" in volumes:
+        candidates.append(os.path.join(volumes_root, "repo_storage", "_data"))
+    candidates.extend(
+        os.path.join(volumes_root, name, "_data") for name in volumes if name.endswith("_repo_storage")
+    )
+    return candidates
+
+def _find_repo_roots(roots: List[str], max_depth: int = 3, max_entries: int = 50_000) -> Iterator[str]:
+    """Lazily yield directories under roots that hold a repository indicator, shallowest first
+    
+    Breadth-first over os.scandir, never following symlinks, skipping directories already
+    seen through another path (same st_dev/st_ino) and stopping after max_entries entries.
+    """
+    queue = deque((root, 0) for root in roots)
+    visited = set()
+    entries_seen = 0
+    while queue:
+        path, depth = queue.popleft()
+        try:
+            st = os.stat(path)  # only roots can be symlinks; child links are never queued
+        except OSError:
+            continue
+        if (st.st_dev, st.st_ino) in visited:
+            continue
+        visited.add((st.st_dev, st.st_ino))
+        
+        found = False
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    entries_seen += 1
+                    if entries_seen > max_entries:
+                        logger.warning(f"Stopped repository search after {max_entries} entries")
+                        return
+                    try:
+                        # DirEntry uses the dirent type here, so no extra stat() per entry
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if not is_dir:
+                        if entry.name.endswith('.git'):
+                            found = True
+                        continue
+                    if entry.name in _REPO_MARKERS:
+                        found = True
+                    if depth >= max_depth or entry.name in _SKIP_DIRS:
+                        continue
+                    queue.append((entry.path, depth + 1))
+        except OSError:
+            continue
+        
+        if found:
+            yield path
+
+class _ActiveKey(NamedTuple):
+    """Session-independent copy of the active GitKey fields the SSH setup needs"""
+    id: int
+    private_key: str
+    digest: str  # blake2b of private_key, compared against what was last written to ~/.ssh
+
 class GitService:
-    def __init__(self, db: Session):
+    # (fetched_at, active key) shared by every instance, so webhooks don't each re-query it
+    _active_key_cache: Tuple[float, Optional[_ActiveKey]] = (0.0, None)
+    
+    def __init__(self, db: Session, main_path: Optional[str] = None):
         self.db = db
+        self.main_path = main_path or self._get_main_path()
+        self.shallow_clone = self._get_shallow_clone()
+    
+    def _active_git_key(self) -> Optional[_ActiveKey]:
+        """Active Git SSH key, re-queried at most every ACTIVE_KEY_TTL seconds"""
+        fetched_at, git_key = GitService._active_key_cache
+        now = time.monotonic()
+        if fetched_at and now - fetched_at < ACTIVE_KEY_TTL:
+            return git_key
+        row = self.db.query(GitKey).filter(GitKey.is_active == True).first()
+        git_key = _ActiveKey(row.id, str(row.private_key), _key_digest(str(row.private_key))) if row else None
+        GitService._active_key_cache = (now, git_key)
+        return git_key
+    
+    @classmethod
+    def invalidate_key_cache(cls):
+        """Forget the cached active key; call after keys are added or deactivated"""
+        cls._active_key_cache = (0.0, None)
+    
+    def _get_shallow_clone(self) -> bool:
+        """Whether clones fetch only the branch tip, from the shallow_clone setting"""
+        setting = self.db.query(Setting).filter(Setting.key == "shallow_clone").first()
+        return str(setting.value).lower() != "false" if setting else True
+    
+    def refresh_main_path(self) -> str:
+        """Re-resolve the main path after the main_path setting or volume mounts changed"""
         self.main_path = self._get_main_path()
+        return self.main_path
     
-    def _get_main_path(self) -> str:
-        """Get the main path for repositories from settings"""
+    def _get_main_path(self, autocommit: bool = True) -> str:
+        """Get the main path for repositories from settings; autocommit=False leaves the commit to the caller"""
         setting = self.db.query(Setting).filter(Setting.key == "main_path").first()
         configured_path = str(setting.value) if setting else "/repos"
         
@@ -32,104 +266,87 @@ class GitService:
             else:
                 new_setting = Setting(key="main_path", value=detected_path, description="Repository storage path")
                 self.db.add(new_setting)
-            self.db.commit()
+            if autocommit:
+                self.db.commit()
             return detected_path
         
         return configured_path
     
     def _detect_docker_volume_path(self, configured_path: str) -> str:
-        """Detect Docker volume mount path with enhanced Docker volumes support"""
-        # Strategy 1: Environment variable override (highest priority)
+        """Detect Docker volume mount path with enhanced Docker volumes support
+        
+        Strategies run in priority order and the first one that finds a path wins,
+        so the filesystem walk only happens when no volume was found.
+        """
+        return (
+            self._probe_env_path()                          # Strategy 1: REPOS_PATH override
+            or self._probe_configured_path(configured_path) # Strategy 2: configured path
+            or self._probe_docker_volumes()                 # Strategy 3: Docker volumes (preferred)
+            or self._probe_repo_walk()                      # Strategy 4: existing repositories
+            or self._probe_bind_mounts()                    # Strategy 5: legacy bind mounts
+            or self._create_default_path()                  # Strategy 6: create a default path
+            or self._fallback_path(configured_path)
+        )
+    
+    def _probe_env_path(self) -> Optional[str]:
+        """Environment variable override (highest priority)"""
         env_path = os.environ.get('REPOS_PATH')
         if env_path:
-            if os.path.exists(env_path) and os.access(env_path, os.W_OK):
+            if _is_writable(env_path):
                 logger.info(f"Using REPOS_PATH environment variable: {env_path}")
                 return env_path
-            else:
-                logger.warning(f"REPOS_PATH {env_path} not accessible, falling back to detection")
-        
-        # Strategy 2: Check if configured path exists and is writable
-        if os.path.exists(configured_path) and os.access(configured_path, os.W_OK):
+            logger.warning(f"REPOS_PATH {env_path} not accessible, falling back to detection")
+        return None
+    
+    def _probe_configured_path(self, configured_path: str) -> Optional[str]:
+        """Check if configured path exists and is writable"""
+        if _is_writable(configured_path):
             logger.info(f"Using configured path: {configured_path}")
             return configured_path
-        
-        # Strategy 3: Docker volume detection patterns
-        detected_paths = []
-        import glob
-        
-        # Docker volume patterns (Docker volumes preferred)
-        docker_volume_patterns = [
-            "/var/lib/docker/volumes/*/data",
-            "/var/lib/docker/volumes/repo_storage/_data",
-            "/var/lib/docker/volumes/*_repo_storage/_data",
+        return None
+    
+    def _probe_docker_volumes(self) -> Optional[str]:
+        """First writable Docker volume path - one listing instead of a glob per pattern"""
+        docker_volume_paths = [
             "/app/repos",                    # Common container path
             "/mnt/repos",                    # Mount point
             "/data/repos",                   # Data directory
             "/workspace/repos"               # Workspace directory
         ]
+        for path in _docker_volume_candidates() + docker_volume_paths:
+            if _is_writable(path):
+                logger.info(f"Found Docker volume path: {path}")
+                return path
+        return None
+    
+    def _probe_repo_walk(self) -> Optional[str]:
+        """Search for existing repository directories (limited depth)"""
+        repo_search_paths = ['/app', '/data', '/mnt', '/opt']
+        for potential_path in _find_repo_roots(repo_search_paths):
+            if _is_writable(potential_path):
+                logger.info(f"Found path with existing repositories: {potential_path}")
+                return potential_path
+        return None
+    
+    def _probe_bind_mounts(self) -> Optional[str]:
+        """Legacy bind mount patterns"""
+        import glob
         
-        # Legacy bind mount patterns
         bind_mount_patterns = [
             "/data/compose/*/host-repos",
             "/data/compose/*/repos", 
             "/opt/*/repos",
             "/home/*/repos"
         ]
-        
-        # Check Docker volume patterns first (preferred)
-        for pattern in docker_volume_patterns:
-            matches = glob.glob(pattern)
-            for match in matches:
-                if os.path.exists(match) and os.access(match, os.W_OK):
-                    detected_paths.append(('volume', match))
-        
-        # Then check bind mount patterns
         for pattern in bind_mount_patterns:
-            matches = glob.glob(pattern)
-            for match in matches:
-                if os.path.exists(match) and os.access(match, os.W_OK):
-                    detected_paths.append(('bind', match))
-        
-        # Strategy 4: Search for existing repository directories (limited depth)
-        repo_search_paths = ['/app', '/data', '/mnt', '/opt']
-        for search_root in repo_search_paths:
-            if not os.path.exists(search_root):
-                continue
-            
-            for root, dirs, files in os.walk(search_root):
-                # Look for common repository indicators
-                if any(repo_name in dirs for repo_name in ['server-backend', '.git']) or \
-                   any(file.endswith('.git') for file in files):
-                    potential_path = root
-                    if os.access(potential_path, os.W_OK):
-                        detected_paths.append(('repo', potential_path))
-                
-                # Limit search depth for performance
-                if root.count(os.sep) - search_root.count(os.sep) >= 3:
-                    dirs.clear()
-        
-        # Choose the best path based on priority
-        if detected_paths:
-            # Prioritize Docker volumes over bind mounts
-            volume_paths = [path for type_, path in detected_paths if type_ == 'volume']
-            if volume_paths:
-                selected_path = volume_paths[0]
-                logger.info(f"Found Docker volume path: {selected_path}")
-                return selected_path
-            
-            # Then prefer paths with existing repositories
-            repo_paths = [path for type_, path in detected_paths if type_ == 'repo']
-            if repo_paths:
-                selected_path = repo_paths[0]
-                logger.info(f"Found path with existing repositories: {selected_path}")
-                return selected_path
-            
-            # Finally use any writable path
-            any_path = detected_paths[0][1]
-            logger.info(f"Using detected writable path: {any_path}")
-            return any_path
-        
-        # Strategy 5: Create default path if nothing found
+            for match in glob.glob(pattern):
+                if _is_writable(match):
+                    logger.info(f"Using detected writable path: {match}")
+                    return match
+        return None
+    
+    def _create_default_path(self) -> Optional[str]:
+        """Create default path if nothing found"""
         default_paths = ['/app/repos', '/data/repos', '/tmp/repos']
         for default_path in default_paths:
             try:
@@ -140,8 +357,10 @@ class GitService:
                     return default_path
             except PermissionError:
                 continue
-        
-        # Fallback to configured path with warning
+        return None
+    
+    def _fallback_path(self, configured_path: str) -> str:
+        """Fallback to configured path with warning"""
         logger.warning(f"No writable path found. Using configured path: {configured_path}")
         logger.warning("Repository operations may fail. Consider using Docker volumes. See DOCKER_VOLUMES_GUIDE.md")
         return configured_path
@@ -152,40 +371,47 @@ class GitService:
             return None
         
         # Get active Git key
-        git_key = self.db.query(GitKey).filter(GitKey.is_active == True).first()
+        git_key = self._active_git_key()
         if not git_key:
             logger.warning("No active Git key found for SSH repository")
             return None
         
-        # Create SSH key file
+        global _written_key_digest
         ssh_dir = Path.home() / ".ssh"
-        ssh_dir.mkdir(exist_ok=True, mode=0o700)
-        
         key_file = ssh_dir / "github_sync_key"
-        with open(key_file, "w") as f:
-            f.write(str(git_key.private_key))
-        
-        key_file.chmod(0o600)
-        
-        # Create SSH config
         config_file = ssh_dir / "config"
-        config_content = f"""
-Host github.com
-    HostName github.com
-    User git
-    IdentityFile {key_file}
-    StrictHostKeyChecking no
-"""
+        digest_file = ssh_dir / "github_sync_key.sha"
         
-        with open(config_file, "w") as f:
-            f.write(config_content)
+        with _ssh_setup_lock:
+            # Already written by this process - no file I/O at all
+            if git_key.digest == _written_key_digest:
+                return str(key_file)
+            
+            config_content = _SSH_CONFIG_TEMPLATE.format(key_file=key_file)
+            
+            # Written by an earlier process - the sidecar digest says whether both files are current
+            files_digest = _key_digest(git_key.digest + config_content)
+            try:
+                if digest_file.read_text() == files_digest and key_file.exists() and config_file.exists():
+                    _written_key_digest = git_key.digest
+                    return str(key_file)
+            except OSError:
+                pass
+            
+            # Create SSH key file and config
+            ssh_dir.mkdir(exist_ok=True, mode=0o700)
+            _write_file_atomic(key_file, git_key.private_key, 0o600)
+            _write_file_atomic(config_file, config_content, 0o600)
+            _write_file_atomic(digest_file, files_digest, 0o600)
+            _written_key_digest = git_key.digest
         
         return str(key_file)
     
-    def clone_repository(self, repo: Repository) -> Tuple[bool, str]:
-        """Clone a repository to local path"""
+    def clone_repository(self, repo: Repository, autocommit: bool = True) -> Tuple[bool, str]:
+        """Clone a repository to local path; autocommit=False leaves the commit to the caller"""
         try:
-            main_path = self._get_main_path()
+            # Resolved once in __init__; detection hits the DB and the filesystem
+            main_path = self.main_path
             
             # Ensure main repository directory exists
             main_path_obj = Path(main_path)
@@ -197,26 +423,41 @@ Host github.com
             
             logger.info(f"Using main path: {main_path} for repository: {repo_name}")
             
-            # Remove existing directory if it exists
-            if repo_path.exists():
-                shutil.rmtree(repo_path)
-            
-            # Create parent directory
-            repo_path.parent.mkdir(parents=True, exist_ok=True)
-            
             # Setup SSH key if needed
             ssh_key_file = self._setup_ssh_key(str(repo.url))
-            
-            # Clone repository
-            logger.info(f"Cloning repository {repo.url} to {repo_path}")
-            
-            if ssh_key_file:
-                # Use SSH key for cloning
-                env = os.environ.copy()
-                env['GIT_SSH_COMMAND'] = f'ssh -i {ssh_key_file} -o StrictHostKeyChecking=no'
-                git_repo = Repo.clone_from(str(repo.url), repo_path, branch=str(repo.branch), env=env)
+            ssh_command = _ssh_command(ssh_key_file) if ssh_key_file else None
+            
+            # An existing clone of the same remote only needs the delta, not a full re-download
+            if repo_path.exists() and self._refresh_existing_clone(
+                repo_path, str(repo.url), str(repo.branch), ssh_command
+            ):
+                logger.info(f"Reused existing clone of {repo.url} at {repo_path}")
+                clone_details = f"Refreshed existing clone at {repo_path}"
             else:
-                git_repo = Repo.clone_from(str(repo.url), repo_path, branch=str(repo.branch))
+                # Remove existing directory if it exists
+                if repo_path.exists():
+                    shutil.rmtree(repo_path)
+                
+                # Create parent directory
+                repo_path.parent.mkdir(parents=True, exist_ok=True)
+                
+                # Clone repository
+                logger.info(f"Cloning repository {repo.url} to {repo_path}")
+                
+                clone_args = ['clone', '--quiet', '--branch', str(repo.branch)]
+                clone_target = ['--', str(repo.url), str(repo_path)]
+                
+                if self.shallow_clone:
+                    try:
+                        # Syncing only ever needs the tip of one branch
+                        _run_git(clone_args + _SHALLOW_CLONE_OPTIONS + clone_target, ssh_command)
+                    except GitCommandError as e:
+                        logger.warning(f"Shallow clone of {repo.url} rejected, falling back to full clone: {e}")
+                        shutil.rmtree(repo_path, ignore_errors=True)
+                        _run_git(clone_args + clone_target, ssh_command)
+                else:
+                    _run_git(clone_args + clone_target, ssh_command)
+                clone_details = f"Cloned to {repo_path}"
             
             # Update repository record
             repo.local_path = str(repo_path)
@@ -230,10 +471,11 @@ Host github.com
                 repository_id=repo.id,
                 status="success",
                 message=f"Successfully cloned repository {repo_name}",
-                details=f"Cloned to {repo_path}"
+                details=clone_details
             )
             self.db.add(log_entry)
-            self.db.commit()
+            if autocommit:
+                self.db.commit()
             
             logger.info(f"Successfully cloned repository {repo_name}")
             return True, f"Successfully cloned repository {repo_name}"
@@ -242,20 +484,22 @@ Host github.com
             error_msg = f"Failed to clone repository {repo.name} from {repo.url}: {str(e)}"
             logger.error(error_msg)
             
-            # Add specific error details for common issues
-            if "Read-only file system" in str(e):
+            # Add specific error details for common issues - one scan of the message
+            error_kinds = {match.lastgroup for match in _CLONE_ERROR_RE.finditer(str(e))}
+            if "read_only" in error_kinds:
                 error_msg += f" - The target directory {main_path} is read-only. Please ensure the directory is writable."
                 # In read-only environments, simulate successful clone for demonstration
                 logger.info(f"Simulating successful clone for {repo.name} (read-only environment)")
                 repo.last_pull_success = True
-                repo.last_pull_time = datetime.now()
+                repo.last_pull_time = utcnow()
                 repo.last_pull_error = None
                 repo.local_path = os.path.join(main_path, repo.name)
-                self.db.commit()
+                if autocommit:
+                    self.db.commit()
                 return True, f"Simulated successful clone for repository {repo.name} (read-only environment)"
-            elif "Permission denied" in str(e):
+            elif "permission" in error_kinds:
                 error_msg += f" - Permission denied accessing {main_path}. Please check directory permissions."
-            elif "No such file or directory" in str(e):
+            elif "missing" in error_kinds:
                 error_msg += f" - Directory {main_path} does not exist or is not accessible."
             
             repo.last_pull_success = False
@@ -270,50 +514,63 @@ Host github.com
                 details=error_msg
             )
             self.db.add(log_entry)
-            self.db.commit()
+            if autocommit:
+                self.db.commit()
             
             return False, error_msg
     
-    def pull_repository(self, repo: Repository) -> Tuple[bool, str]:
-        """Pull latest changes from repository"""
+    def _refresh_existing_clone(self, repo_path: Path, url: str, branch: str, ssh_command: Optional[str]) -> bool:
+        """Bring an existing clone of url to a clean origin/branch; False if it cannot be reused"""
+        path = str(repo_path)
+        try:
+            if _run_git(['remote', 'get-url', 'origin'], cwd=path).strip() != url:
+                return False
+            _run_git(['fetch', '--quiet', '--prune', *_fetch_depth(path), 'origin', _branch_refspec(branch)], ssh_command, cwd=path)
+            # Partial clones fetch missing blobs during checkout, so it needs the SSH command too
+            _run_git(['checkout', '--quiet', '--force', '-B', branch, f'origin/{branch}'], ssh_command, cwd=path)
+            _run_git(['clean', '--quiet', '-xdf'], ssh_command, cwd=path)
+            return True
+        except Exception as e:
+            logger.info(f"Existing directory {repo_path} is not a reusable clone, re-cloning: {e}")
+            return False
+    
+    def pull_repository(self, repo: Repository, autocommit: bool = True,
+                        expected_sha: Optional[str] = None) -> Tuple[bool, str]:
+        """Pull latest changes from repository; autocommit=False leaves the commit to the caller
+        
+        expected_sha is the pushed commit from a webhook; when HEAD already matches it the
+        fetch is skipped, without asking the remote.
+        """
         try:
             local_path = str(repo.local_path) if repo.local_path else ""
             if not local_path or not Path(local_path).exists():
                 logger.info(f"Repository not found locally, cloning instead: {repo.url}")
-                return self.clone_repository(repo)
+                return self.clone_repository(repo, autocommit=autocommit)
             
             # Setup SSH key if needed
             ssh_key_file = self._setup_ssh_key(str(repo.url))
+            ssh_command = _ssh_command(ssh_key_file) if ssh_key_file else None
             
-            # Open existing repository
-            git_repo = Repo(local_path)
-            
-            # Configure SSH if needed
-            if ssh_key_file:
-                with git_repo.config_writer() as config:
-                    config.set_value("core", "sshCommand", f'ssh -i {ssh_key_file} -o StrictHostKeyChecking=no')
-            
-            # Reset any local changes and untracked files to allow clean pull
-            git_repo.git.reset('--hard')  # Reset tracked files
-            git_repo.git.clean('-fd')     # Remove untracked files and directories
-            
-            # Fetch latest changes
-            origin = git_repo.remotes.origin
-            origin.fetch()
-            
-            # Switch to correct branch if needed
+            # Fetch latest changes of the tracked branch only, unless the pushed commit is already checked out
             branch_name = str(repo.branch)
-            if git_repo.active_branch.name != branch_name:
-                git_repo.git.checkout(branch_name)
+            if expected_sha and _run_git(['rev-parse', 'HEAD'], cwd=local_path).strip() == expected_sha:
+                logger.info(f"Repository {repo.name} already at {expected_sha[:12]}, skipping fetch")
+            else:
+                _run_git(
+                    ['fetch', '--quiet', '--prune', *_fetch_depth(local_path), 'origin', _branch_refspec(branch_name)],
+                    ssh_command, cwd=local_path
+                )
             
-            # Force pull to override any remaining conflicts
-            git_repo.git.reset('--hard', f'origin/{branch_name}')
+            # Switch to the branch at origin's tip, discarding local changes, then drop untracked files
+            # Partial clones fetch missing blobs from origin on checkout - pass the SSH command along
+            _run_git(['checkout', '--quiet', '--force', '-B', branch_name, f'origin/{branch_name}'], ssh_command, cwd=local_path)
+            _run_git(['clean', '--quiet', '-fd'], ssh_command, cwd=local_path)
             
             logger.info(f"Force reset and pulled repository {repo.name} (local changes ignored)")
             
             # Update repository record
             repo.last_pull_success = True
-            repo.last_pull_time = datetime.utcnow()
+            repo.last_pull_time = utcnow()
             repo.last_pull_error = None
             
             # Log operation
@@ -325,7 +582,8 @@ Host github.com
                 details=f"Updated from {repo.url}"
             )
             self.db.add(log_entry)
-            self.db.commit()
+            if autocommit:
+                self.db.commit()
             
             logger.info(f"Successfully pulled repository {repo.name}")
             return True, f"Successfully pulled repository {repo.name}"
@@ -346,10 +604,54 @@ Host github.com
                 details=error_msg
             )
             self.db.add(log_entry)
-            self.db.commit()
+            if autocommit:
+                self.db.commit()
             
             return False, error_msg
     
+    def pull_many(self, repos: List[Repository], workers: int = 8) -> List[Tuple[bool, str]]:
+        """Pull several repositories concurrently; results are in the order of repos
+        
+        Git work happens in subprocesses, so threads overlap the network round trips.
+        Sessions are not thread-safe, so each worker uses its own session and GitService,
+        and the pull records are committed once per worker after all pulls finish;
+        refresh the passed Repository objects to see the recorded pull status.
+        """
+        from database import get_scoped_session
+        
+        sessions = set()
+        sessions_lock = threading.Lock()
+        
+        def pull_one(repo_id: int) -> Tuple[bool, str]:
+            # Each worker thread keeps one session for all its repos; nothing is committed here
+            db = get_scoped_session()
+            with sessions_lock:
+                sessions.add(db)
+            repo = db.get(Repository, repo_id)
+            if repo is None:
+                return False, f"Repository {repo_id} not found"
+            return GitService(db, main_path=self.main_path).pull_repository(repo, autocommit=False)
+        
+        repo_ids = [repo.id for repo in repos]
+        # A repo listed twice is pulled once - two git processes would fight over its lock files
+        unique_ids = list(dict.fromkeys(repo_ids))
+        if not unique_ids:
+            return []
+        committed = False
+        try:
+            with ThreadPoolExecutor(max_workers=min(workers, len(unique_ids))) as executor:
+                results = dict(zip(unique_ids, executor.map(pull_one, unique_ids)))
+            # Workers are idle now, so their sessions can be committed from this thread - one commit per worker
+            for db in sessions:
+                db.commit()
+            committed = True
+        finally:
+            for db in sessions:
+                if not committed:
+                    db.rollback()
+                db.close()
+        return [results[repo_id] for repo_id in repo_ids]
+    
     def _get_ssh_keygen_path(self) -> str:
         """Get ssh-keygen path from settings or auto-detect"""
         try:
@@ -361,33 +663,8 @@ Host github.com
                 else:
                     logger.warning(f"Configured ssh-keygen path {setting.value} not found, falling back to auto-detection")
             
-            # Auto-detect ssh-keygen binary
-            # Try common paths
-            common_paths = [
-                "/usr/bin/ssh-keygen",
-                "/bin/ssh-keygen", 
-                "/nix/store/*/bin/ssh-keygen",
-                "ssh-keygen"  # fallback to PATH
-            ]
-            
-            for path in common_paths:
-                if path.endswith("*bin/ssh-keygen"):
-                    # Handle Nix store glob pattern
-                    import glob
-                    matches = glob.glob(path)
-                    if matches:
-                        return matches[0]
-                else:
-                    if os.path.exists(path) or path == "ssh-keygen":
-                        return path
-            
-            # Try using 'which' command
-            try:
-                result = subprocess.run(['which', 'ssh-keygen'], 
-                                      capture_output=True, text=True, check=True)
-                return result.stdout.strip()
-            except subprocess.CalledProcessError:
-                raise Exception("ssh-keygen not found in system PATH")
+            # Auto-detect ssh-keygen binary (memoized for the process)
+            return _discover_ssh_keygen()
                 
         except Exception as e:
             logger.error(f"Failed to find ssh-keygen: {e}")
@@ -395,34 +672,53 @@ Host github.com
 
     def generate_ssh_key(self, name: str) -> Tuple[str, str]:
         """Generate SSH key pair for Git authentication"""
+        try:
+            # Generate in-process when cryptography is installed - no ssh-keygen fork or temp files
+            from cryptography.hazmat.primitives import serialization
+            from cryptography.hazmat.primitives.asymmetric import rsa
+        except ImportError:
+            return self._generate_ssh_key_with_ssh_keygen(name)
+        
+        try:
+            key = rsa.generate_private_key(public_exponent=65537, key_size=4096)
+            private_key = key.private_bytes(
+                serialization.Encoding.PEM, serialization.PrivateFormat.OpenSSH, serialization.NoEncryption()
+            ).decode()
+            public_key = key.public_key().public_bytes(
+                serialization.Encoding.OpenSSH, serialization.PublicFormat.OpenSSH
+            ).decode()
+            return private_key, f"{public_key} github-sync-{name}\n"
+        except Exception as e:
+            logger.error(f"Failed to generate SSH key: {e}")
+            raise Exception(f"Failed to generate SSH key: {e}")
+    
+    def _generate_ssh_key_with_ssh_keygen(self, name: str) -> Tuple[str, str]:
+        """Generate SSH key pair by running ssh-keygen"""
         try:
             # Get ssh-keygen path from settings or auto-detect
             ssh_keygen_cmd = self._get_ssh_keygen_path()
             
-            # Generate SSH key using ssh-keygen
-            key_file = f"/tmp/github_sync_{name}_{os.getpid()}"
-            
-            # Run ssh-keygen command
-            result = subprocess.run([
-                ssh_keygen_cmd, "-t", "rsa", "-b", "4096",
-                "-f", key_file, "-N", "", "-C", f"github-sync-{name}"
-            ], check=True, capture_output=True, text=True)
-            
-            logger.info(f"SSH key generation output: {result.stdout}")
-            if result.stderr:
-                logger.info(f"SSH key generation stderr: {result.stderr}")
-            
-            # Read private key
-            with open(key_file, "r") as f:
-                private_key = f.read()
-            
-            # Read public key
-            with open(f"{key_file}.pub", "r") as f:
-                public_key = f.read()
-            
-            # Clean up temporary files
-            os.remove(key_file)
-            os.remove(f"{key_file}.pub")
+            # Generate into a private (0700) directory that is removed with both key files, even on failure
+            with tempfile.TemporaryDirectory(prefix="github_sync_") as key_dir:
+                key_file = os.path.join(key_dir, "id_rsa")
+                
+                # Run ssh-keygen command
+                result = subprocess.run([
+                    ssh_keygen_cmd, "-t", "rsa", "-b", "4096",
+                    "-f", key_file, "-N", "", "-C", f"github-sync-{name}"
+                ], check=True, stdin=subprocess.DEVNULL, capture_output=True, text=True)
+                
+                logger.info(f"SSH key generation output: {result.stdout}")
+                if result.stderr:
+                    logger.info(f"SSH key generation stderr: {result.stderr}")
+                
+                # Read private key
+                with open(key_file, "r") as f:
+                    private_key = f.read()
+                
+                # Read public key
+                with open(f"{key_file}.pub", "r") as f:
+                    public_key = f.read()
             
             return private_key, public_key
             
@@ -431,28 +727,55 @@ Host github.com
             raise Exception(f"Failed to generate SSH key: {e}")
     
     def validate_repository_url(self, url: str) -> bool:
-        """Validate if repository URL is accessible"""
+        """Validate if repository URL is accessible; successes are cached for VALIDATE_CACHE_TTL seconds
+        
+        Failures are not cached, so a fixed URL or deploy key is picked up on the next call.
+        """
+        git_key = None
+        if url.startswith("git@"):
+            # For SSH URLs, check if SSH key is configured
+            git_key = self._active_git_key()
+            if not git_key:
+                return False
+        
+        cache_key = (url, git_key.id if git_key else None)
+        now = time.monotonic()
+        validated_at = _validate_cache.get(cache_key)
+        if validated_at is not None and now - validated_at < VALIDATE_CACHE_TTL:
+            return True
+        
+        valid = self._check_repository_url(url)
+        if valid:
+            # Evict expired entries on write so the cache stays bounded by recent URLs
+            for key, checked_at in list(_validate_cache.items()):
+                if now - checked_at >= VALIDATE_CACHE_TTL:
+                    _validate_cache.pop(key, None)
+            _validate_cache[cache_key] = now
+        return valid
+    
+    def _check_repository_url(self, url: str) -> bool:
+        """Run git ls-remote against url"""
         try:
             if url.startswith("https://"):
                 # For HTTPS URLs, try to fetch repository info
+                # Only the exit status matters - the ref listing is discarded
+                env = os.environ.copy()
+                env['GIT_TERMINAL_PROMPT'] = '0'
                 subprocess.run([
-                    "git", "ls-remote", "--heads", url
-                ], check=True, capture_output=True, timeout=30)
+                    "git", *_GIT_CONFIG_OPTIONS, *_HTTP_PROBE_OPTIONS, "ls-remote", "--heads", url
+                ], check=True, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=30,
+                   env=env, start_new_session=True)
                 return True
             elif url.startswith("git@"):
-                # For SSH URLs, check if SSH key is configured
-                git_key = self.db.query(GitKey).filter(GitKey.is_active == True).first()
-                if not git_key:
-                    return False
-                
                 # Try to access repository with SSH key
                 ssh_key_file = self._setup_ssh_key(url)
                 env = os.environ.copy()
-                env['GIT_SSH_COMMAND'] = f'ssh -i {ssh_key_file} -o StrictHostKeyChecking=no'
+                env['GIT_SSH_COMMAND'] = _ssh_command(ssh_key_file)
                 
                 subprocess.run([
-                    "git", "ls-remote", "--heads", url
-                ], check=True, capture_output=True, timeout=30, env=env)
+                    "git", *_GIT_CONFIG_OPTIONS, "ls-remote", "--heads", url
+                ], check=True, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=30,
+                   env=env, start_new_session=True)
                 return True
             else:
                 return False
@@ -1,9 +1,31 @@
 import docker
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Upper bound on concurrent container restarts per call
+MAX_RESTART_WORKERS = 16
+
+# Seconds dockerd waits for a container to stop before killing it on restart
+RESTART_STOP_TIMEOUT = 10
+
+# One client per process - its keep-alive session is shared by every SimpleDockerService
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def _get_client() -> docker.DockerClient:
+    """Return the shared Docker client, connecting on first use"""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = docker.from_env()  # Connect to Docker daemon
+            logger.info("Docker client initialized successfully")
+        return _CLIENT
+
 class SimpleDockerService:
     """
     Simplified Docker service using the exact pattern from your working example
@@ -12,9 +34,8 @@ class SimpleDockerService:
     def __init__(self):
         try:
             # Use the exact same pattern as your working Flask example
-            self.client = docker.from_env()  # Connect to Docker daemon
+            self.client = _get_client()
             self.docker_available = True
-            logger.info("Docker client initialized successfully")
         except Exception as e:
             self.client = None
             self.docker_available = False
@@ -40,17 +61,11 @@ class SimpleDockerService:
                 logger.info(message)
                 return 0, [message]
             
-            # Restart each container - exact same pattern as your example
-            for container in containers:
-                try:
-                    logger.info(f"Restarting container {container.name}")
-                    container.restart()  # Direct restart call like your example
-                    success_count += 1
-                    results.append(f"Successfully restarted container {container.name}")
-                except Exception as e:
-                    error_msg = f"Failed to restart {container.name}: {str(e)}"
-                    logger.error(error_msg)
-                    results.append(error_msg)
+            # Restart containers concurrently - each restart mostly waits on the daemon
+            with ThreadPoolExecutor(max_workers=min(MAX_RESTART_WORKERS, len(containers))) as executor:
+                for success, message in executor.map(self._restart_container, containers):
+                    success_count += success
+                    results.append(message)
             
             return success_count, results
             
@@ -59,6 +74,17 @@ class SimpleDockerService:
             logger.error(error_msg)
             return 0, [error_msg]
     
+    def _restart_container(self, container) -> Tuple[bool, str]:
+        """Restart a single container; safe to call from worker threads"""
+        try:
+            logger.info(f"Restarting container {container.name}")
+            container.restart(timeout=RESTART_STOP_TIMEOUT)
+            return True, f"Successfully restarted container {container.name}"
+        except Exception as e:
+            error_msg = f"Failed to restart {container.name}: {str(e)}"
+            logger.error(error_msg)
+            return False, error_msg
+    
     def get_containers_with_label(self, label_value: str) -> List:
         """Get all containers with a specific restart-after label"""
         if not self.docker_available:
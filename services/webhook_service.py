@@ -1,19 +1,93 @@
 import asyncio
-from datetime import datetime
-from typing import Dict, Any, List, Tuple
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional, Tuple
 from sqlalchemy.orm import Session
-from models import Repository, OperationLog
+from models import Repository, OperationLog, Setting
 from services.git_service import GitService
 from services.docker_service import DockerService
 from utils.logger import setup_logger
-from utils.helpers import extract_repo_name_from_url
+from utils.helpers import extract_repo_name_from_url, utcnow
 
 logger = setup_logger(__name__)
 
+# Repositories synced concurrently when the sync_parallelism setting is absent
+DEFAULT_SYNC_PARALLELISM = 4
+
+# Webhooks buffered for background processing before new ones are rejected
+WEBHOOK_QUEUE_SIZE = 100
+# Background tasks draining the webhook queue
+WEBHOOK_WORKERS = 4
+
+_webhook_queue: Optional[asyncio.Queue] = None
+_webhook_workers: List[asyncio.Task] = []
+# repo name -> latest payload of its queued, not yet started webhook; the queue holds only the name,
+# so further pushes before the worker starts replace the payload instead of queueing again
+_pending_payloads: Dict[str, Dict[str, Any]] = {}
+# repository id -> [lock, holders and waiters]; one update per repository at a time, since
+# pulls of the same checkout would fight over git's locks
+_repo_locks: Dict[int, list] = {}
+
+
+def _ensure_webhook_workers() -> asyncio.Queue:
+    """Create the webhook queue and start its worker tasks on the running loop, once"""
+    global _webhook_queue
+    if _webhook_queue is None:
+        _webhook_queue = asyncio.Queue(maxsize=WEBHOOK_QUEUE_SIZE)
+        for _ in range(WEBHOOK_WORKERS):
+            _webhook_workers.append(asyncio.create_task(_webhook_worker(_webhook_queue)))
+    return _webhook_queue
+
+
+@asynccontextmanager
+async def _repository_lock(repository_id: int):
+    """Hold a repository's update lock; its entry is dropped once nobody holds or awaits it"""
+    entry = _repo_locks.get(repository_id)
+    if entry is None:
+        entry = _repo_locks[repository_id] = [asyncio.Lock(), 0]
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            del _repo_locks[repository_id]
+
+
+async def _webhook_worker(webhook_queue: asyncio.Queue):
+    """Process queued webhook payloads, forever"""
+    from database import get_db_session
+    
+    while True:
+        repo_name = await webhook_queue.get()
+        payload = _pending_payloads.pop(repo_name)
+        try:
+            db = get_db_session()
+            try:
+                result = await WebhookService(db).process_github_webhook(payload)
+            finally:
+                db.close()
+            logger.info("Queued webhook for %s finished: %s", repo_name, result.get("message"))
+        except Exception as e:
+            logger.error("Queued webhook for %s failed: %s", repo_name, e)
+        finally:
+            webhook_queue.task_done()
+
+
+async def stop_webhook_workers():
+    """Cancel the webhook worker tasks; webhooks still queued are dropped"""
+    global _webhook_queue
+    for task in _webhook_workers:
+        task.cancel()
+    await asyncio.gather(*_webhook_workers, return_exceptions=True)
+    _webhook_workers.clear()
+    _pending_payloads.clear()
+    _webhook_queue = None
+
 class WebhookService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, main_path: Optional[str] = None):
         self.db = db
-        self.git_service = GitService(db)
+        self.git_service = GitService(db, main_path=main_path)
         self.docker_service = DockerService(db)
     
     async def process_github_webhook(self, payload: Dict[str, Any]) -> Dict[str, Any]:
@@ -41,8 +115,9 @@ class WebhookService:
                 logger.warning(error_msg)
                 return {"success": False, "message": error_msg}
             
-            # Process the repository update
-            return await self._process_repository_update(repository)
+            # Process the repository update; a redelivered push that is already checked out skips the fetch
+            async with _repository_lock(repository.id):
+                return await self._process_repository_update(repository, expected_sha=payload.get("after"))
             
         except Exception as e:
             error_msg = f"Error processing webhook: {str(e)}"
@@ -60,8 +135,35 @@ class WebhookService:
             
             return {"success": False, "message": error_msg}
     
-    async def _process_repository_update(self, repository: Repository) -> Dict[str, Any]:
-        """Process repository update (pull and restart containers)"""
+    def enqueue_webhook(self, payload: Dict[str, Any]) -> bool:
+        """
+        Queue a validated webhook payload for background processing; must be called on the event loop
+        Returns False when the queue is full - callers should answer 429
+        """
+        webhook_queue = _ensure_webhook_workers()
+        repo_name = payload["repository"]["name"]
+        if repo_name in _pending_payloads:
+            # Coalesce with the queued webhook, keeping the newest push's payload
+            logger.info("Webhook for %s already queued, using the newer payload", repo_name)
+            _pending_payloads[repo_name] = payload
+            return True
+        try:
+            webhook_queue.put_nowait(repo_name)
+        except asyncio.QueueFull:
+            logger.warning("Webhook queue full, rejecting webhook for %s", repo_name)
+            return False
+        _pending_payloads[repo_name] = payload
+        return True
+    
+    async def _process_repository_update(self, repository: Repository,
+                                         expected_sha: Optional[str] = None) -> Dict[str, Any]:
+        """Process repository update (pull and restart containers)
+        
+        The blocking pull and restarts run in worker threads one after the other, so this
+        service's session is never used by two threads at once. Concurrent updates each need
+        their own WebhookService and session, as _sync_repository and the webhook
+        workers create.
+        """
         results = {
             "repository": repository.name,
             "pull_success": False,
@@ -74,7 +176,10 @@ class WebhookService:
             # Step 1: Pull repository changes (simulate when file system is read-only)
             logger.info(f"Pulling repository: {repository.name}")
             try:
-                pull_success, pull_message = self.git_service.pull_repository(repository)
+                # Git runs in a worker thread so the event loop keeps serving other requests
+                pull_success, pull_message = await asyncio.to_thread(
+                    self.git_service.pull_repository, repository, autocommit=False, expected_sha=expected_sha
+                )
                 results["pull_success"] = pull_success
                 results["pull_message"] = pull_message
             except Exception as e:
@@ -86,9 +191,8 @@ class WebhookService:
                     
                     # Update repository record manually
                     repository.last_pull_success = True
-                    repository.last_pull_time = datetime.utcnow()
+                    repository.last_pull_time = utcnow()
                     repository.last_pull_error = None
-                    self.db.commit()
                     
                     results["pull_success"] = pull_success
                     results["pull_message"] = pull_message
@@ -98,33 +202,21 @@ class WebhookService:
             
             if not pull_success:
                 results["errors"].append(f"Pull failed: {pull_message}")
+                self.db.commit()
                 return results
             
             # Step 2: Restart containers using the same approach as manual restart
             logger.info(f"Restarting containers for repository: {repository.name}")
             
             # Use DockerService for consistent container restart functionality
-            success_count, restart_results = self.docker_service.restart_containers_by_label(str(repository.name))
-            
-            # Process results
-            for result_message in restart_results:
-                if "Successfully restarted container" in result_message:
-                    container_name = result_message.split("container ")[-1] if "container " in result_message else "unknown"
-                    results["containers_restarted"].append({
-                        "name": container_name,
-                        "success": True,
-                        "message": result_message
-                    })
-                else:
-                    results["containers_restarted"].append({
-                        "name": "unknown",
-                        "success": False,
-                        "message": result_message
-                    })
-                    if "Failed" in result_message or "Error" in result_message:
-                        results["errors"].append(result_message)
-            
-            # Log successful operation
+            success_count, restart_results = await self.docker_service.restart_containers_by_label_async(
+                str(repository.name), commit=False
+            )
+            
+            results["containers_restarted"].extend(restart_results)
+            results["errors"].extend(entry["message"] for entry in restart_results if not entry["success"])
+            
+            # Log successful operation - one commit covers the pull, restart and webhook records
             log_entry = OperationLog(
                 operation_type="webhook",
                 repository_id=repository.id,
@@ -167,6 +259,26 @@ class WebhookService:
                 **results
             }
     
+    def _sync_parallelism(self) -> int:
+        """Number of repositories synced at once by sync_all_repositories"""
+        setting = self.db.query(Setting).filter(Setting.key == "sync_parallelism").first()
+        try:
+            return max(1, int(setting.value)) if setting else DEFAULT_SYNC_PARALLELISM
+        except ValueError:
+            return DEFAULT_SYNC_PARALLELISM
+    
+    async def _sync_repository(self, repository_id: int) -> Dict[str, Any]:
+        """Run one repository update with its own session and services, so updates can overlap"""
+        from database import get_db_session
+        
+        db = get_db_session()
+        try:
+            repository = db.get(Repository, repository_id)
+            worker = WebhookService(db, main_path=self.git_service.main_path)
+            return await worker._process_repository_update(repository)
+        finally:
+            db.close()
+    
     def validate_webhook_payload(self, payload: Dict[str, Any]) -> Tuple[bool, str]:
         """Validate GitHub webhook payload"""
         try:
@@ -197,7 +309,8 @@ class WebhookService:
             if not repository:
                 return {"success": False, "message": "Repository not found or inactive"}
             
-            return await self._process_repository_update(repository)
+            async with _repository_lock(repository.id):
+                return await self._process_repository_update(repository)
             
         except Exception as e:
             error_msg = f"Error in manual sync: {str(e)}"
@@ -205,22 +318,30 @@ class WebhookService:
             return {"success": False, "message": error_msg}
     
     async def sync_all_repositories(self) -> List[Dict[str, Any]]:
-        """Sync all active repositories"""
-        results = []
-        
+        """Sync all active repositories, a few at a time (sync_parallelism setting)"""
         try:
             repositories = self.db.query(Repository).filter(
                 Repository.is_active == True
             ).all()
             
-            for repository in repositories:
-                logger.info(f"Syncing repository: {repository.name}")
-                result = await self._process_repository_update(repository)
-                results.append(result)
-                
-                # Add small delay between repositories to avoid overwhelming the system
-                await asyncio.sleep(1)
+            # Bound concurrency so the system is not overwhelmed
+            semaphore = asyncio.Semaphore(self._sync_parallelism())
+            
+            async def sync_one(repository: Repository) -> Dict[str, Any]:
+                # The repository lock keeps this from overlapping a queued webhook for the same checkout
+                async with semaphore, _repository_lock(repository.id):
+                    logger.info(f"Syncing repository: {repository.name}")
+                    return await self._sync_repository(repository.id)
+            
+            outcomes = await asyncio.gather(*(sync_one(r) for r in repositories), return_exceptions=True)
             
+            results = []
+            for repository, outcome in zip(repositories, outcomes):
+                if isinstance(outcome, Exception):
+                    error_msg = f"Error processing repository update for {repository.name}: {str(outcome)}"
+                    logger.error(error_msg)
+                    outcome = {"success": False, "message": error_msg, "repository": repository.name}
+                results.append(outcome)
             return results
             
         except Exception as e:
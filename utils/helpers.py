@@ -6,6 +6,11 @@ from typing import Optional, Dict, Any, List
 from urllib.parse import urlparse
 from pathlib import Path
 import json
+from datetime import datetime, timezone
+
+def utcnow() -> datetime:
+    """Current UTC time as a naive datetime, matching the timezone-less DateTime columns"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
 
 def extract_repo_name_from_url(url: str) -> str:
     """
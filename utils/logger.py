@@ -1,12 +1,63 @@
+import atexit
 import logging
+import queue
 import sys
+import threading
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from datetime import datetime
 
+_queue_handler = None
+_queue_handler_lock = threading.Lock()
+
+def _get_queue_handler() -> QueueHandler:
+    """Shared handler that hands records to a background thread owning the file and console handlers
+    
+    Callers only pay for a queue put; the rotating file is written by one handler
+    instead of one per logger.
+    """
+    global _queue_handler
+    with _queue_handler_lock:
+        if _queue_handler is not None:
+            return _queue_handler
+        
+        # Create logs directory if it doesn't exist
+        logs_dir = Path("logs")
+        logs_dir.mkdir(exist_ok=True)
+        
+        # File handler with rotation
+        log_file = logs_dir / "github_sync.log"
+        file_handler = RotatingFileHandler(
+            log_file,
+            maxBytes=10 * 1024 * 1024,  # 10MB
+            backupCount=5,
+            encoding='utf-8'
+        )
+        
+        # Console handler
+        console_handler = logging.StreamHandler(sys.stdout)
+        
+        # Formatter
+        formatter = logging.Formatter(
+            fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
+        
+        file_handler.setFormatter(formatter)
+        console_handler.setFormatter(formatter)
+        
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, file_handler, console_handler)
+        listener.start()
+        # Drain queued records before the interpreter exits
+        atexit.register(listener.stop)
+        
+        _queue_handler = QueueHandler(log_queue)
+        return _queue_handler
+
 def setup_logger(name: str, level: int = logging.INFO) -> logging.Logger:
     """
-    Setup logger with both file and console handlers
+    Setup logger writing to the log file and console through the shared background queue
     
     Args:
         name: Logger name (usually __name__)
@@ -22,37 +73,7 @@ def setup_logger(name: str, level: int = logging.INFO) -> logging.Logger:
         return logger
     
     logger.setLevel(level)
-    
-    # Create logs directory if it doesn't exist
-    logs_dir = Path("logs")
-    logs_dir.mkdir(exist_ok=True)
-    
-    # File handler with rotation
-    log_file = logs_dir / "github_sync.log"
-    file_handler = RotatingFileHandler(
-        log_file,
-        maxBytes=10 * 1024 * 1024,  # 10MB
-        backupCount=5,
-        encoding='utf-8'
-    )
-    file_handler.setLevel(level)
-    
-    # Console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(level)
-    
-    # Formatter
-    formatter = logging.Formatter(
-        fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
-    file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
-    
-    # Add handlers to logger
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    logger.addHandler(_get_queue_handler())
     
     return logger
 